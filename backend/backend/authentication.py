@@ -0,0 +1,151 @@
+"""
+JWT authentication backed by the cache.
+
+Every API request used to load its User row; CachedJWTAuthentication keeps
+resolved users in the cache for AUTH_USER_CACHE_SECONDS and the User
+signals in expenses.signals drop the entry whenever the row changes.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch, get_md5_hash_password
+
+
+BLACKLIST_APP = "rest_framework_simplejwt.token_blacklist"
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def cached_user(user_id):
+    """
+    The user with this id, from the cache when possible; None if there is
+    no such user (misses are not cached).
+    """
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None:
+            cache.set(key, user, settings.AUTH_USER_CACHE_SECONDS)
+    return user
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with the user lookup served from the cache. Applies
+    the same active-user and revoked-password checks on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+def blacklist_cache_key(jti):
+    return f"auth:blacklisted:{jti}"
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist check is answered from the cache.
+    Blacklisted tokens stay cached until they expire anyway; "not
+    blacklisted" is re-checked after AUTH_BLACKLIST_CACHE_SECONDS in case
+    a token was blacklisted outside blacklist() (e.g. in the admin).
+    Without the token_blacklist app there is nothing to check.
+    """
+
+    def check_blacklist(self):
+        key = blacklist_cache_key(self.payload[api_settings.JTI_CLAIM])
+        blacklisted = cache.get(key)
+
+        if blacklisted is None:
+            try:
+                super().check_blacklist()
+                blacklisted = False
+            except TokenError:
+                blacklisted = True
+            cache.set(key, blacklisted, self.cache_timeout(blacklisted))
+
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        cache.set(
+            blacklist_cache_key(self.payload[api_settings.JTI_CLAIM]),
+            True,
+            self.cache_timeout(True)
+        )
+        return blacklisted
+
+    def cache_timeout(self, blacklisted):
+        if not blacklisted:
+            return settings.AUTH_BLACKLIST_CACHE_SECONDS
+        remaining = datetime_from_epoch(self.payload["exp"]) - aware_utcnow()
+        return max(int(remaining.total_seconds()), 1)
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer using the cached user and blacklist lookups.
+    """
+    token_class = CachedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            user = cached_user(user_id)
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(
+                    self.error_messages["no_active_account"],
+                    "no_active_account",
+                )
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and apps.is_installed(BLACKLIST_APP):
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data["refresh"] = str(refresh)
+
+        return data
@@ -0,0 +1,99 @@
+"""
+In-process request metrics, rendered in the Prometheus text format.
+
+Each worker process keeps its own numbers: scrape every worker, or run a
+single one, to see the whole picture. Quantiles come from a sliding window
+of the last METRICS_WINDOW samples per view; sums and counts are totals.
+"""
+
+import threading
+from collections import deque
+
+from django.conf import settings
+
+
+# Exported metric name -> help text
+METRICS = {
+    "request_duration_seconds": "Total time spent handling the request",
+    "db_queries": "Database queries issued per request",
+    "db_duration_seconds": "Time spent executing database queries per request",
+    "render_duration_seconds": "Time spent rendering the response body",
+    "response_bytes": "Size of the response body",
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Summary:
+    __slots__ = ("window", "total", "count")
+
+    def __init__(self, size):
+        self.window = deque(maxlen=size)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.window.append(value)
+        self.total += value
+        self.count += 1
+
+    def quantiles(self):
+        ordered = sorted(self.window)
+        if not ordered:
+            return {}
+        return {q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] for q in QUANTILES}
+
+
+class Registry:
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.summaries = {}
+
+    def observe(self, view, samples):
+        """
+        Record one request: `samples` maps metric names to values.
+        """
+        with self.lock:
+            for name, value in samples.items():
+                key = (name, view)
+                summary = self.summaries.get(key)
+                if summary is None:
+                    summary = self.summaries[key] = Summary(self.window)
+                summary.observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.summaries.clear()
+
+    def render(self, prefix="pycheck_"):
+        with self.lock:
+            snapshot = {
+                key: (summary.quantiles(), summary.total, summary.count)
+                for key, summary in self.summaries.items()
+            }
+
+        lines = []
+        for name, help_text in METRICS.items():
+            rows = sorted((view, data) for (metric, view), data in snapshot.items() if metric == name)
+            if not rows:
+                continue
+
+            lines.append(f"# HELP {prefix}{name} {help_text}")
+            lines.append(f"# TYPE {prefix}{name} summary")
+            for view, (quantiles, total, count) in rows:
+                label = f'view="{escape(view)}"'
+                for q, value in quantiles.items():
+                    lines.append(f'{prefix}{name}{{{label},quantile="{q}"}} {value:.6g}')
+                lines.append(f"{prefix}{name}_sum{{{label}}} {total:.6g}")
+                lines.append(f"{prefix}{name}_count{{{label}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry(settings.METRICS_WINDOW)
@@ -0,0 +1,165 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import registry
+from .routers import (
+    mark_recent_write,
+    reading_from,
+    replica_alias,
+    shard_aliases,
+    user_shard,
+    wrote_recently,
+)
+
+
+def token_user_id(request):
+    """
+    The user id from a valid bearer token, without touching the database.
+    Decoded once per request and kept on it.
+    """
+    if not hasattr(request, "_token_user_id"):
+        request._token_user_id = None
+
+        auth = JWTAuthentication()
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header else None
+        if raw_token is not None:
+            try:
+                token = auth.get_validated_token(raw_token)
+            except (InvalidToken, TokenError):
+                token = {}
+            request._token_user_id = token.get(api_settings.USER_ID_CLAIM)
+
+    return request._token_user_id
+
+
+class ShardRoutingMiddleware:
+    """
+    Route the expenses queries of an API request to the shard of the user
+    in its bearer token.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user_id = token_user_id(request) if len(shard_aliases()) > 1 else None
+        if user_id is None:
+            return self.get_response(request)
+
+        with user_shard(user_id):
+            return self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send the reads of API GET requests to the replica, except for users who
+    wrote within the last REPLICA_STICKY_SECONDS (read-your-writes).
+    Only bearer-token requests are routed; session traffic such as the
+    admin stays on the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if replica_alias() is None:
+            return self.get_response(request)
+
+        user_id = token_user_id(request)
+
+        if request.method in SAFE_METHODS:
+            alias = replica_alias() if user_id and not wrote_recently(user_id) else None
+            with reading_from(alias):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if user_id and response.status_code < 400:
+            mark_recent_write(user_id)
+        return response
+
+
+class QueryTimer:
+    """
+    connection.execute_wrapper hook counting queries and their total time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Time a sample of requests (METRICS_SAMPLE_RATE): total latency, query
+    count and time across every database, render time and response size.
+    The numbers go out in a Server-Timing header and into the per-view
+    summaries served by the metrics endpoint. Unsampled requests pass
+    straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.METRICS_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        request._render_seconds = 0.0
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+
+        samples = {
+            "request_duration_seconds": total,
+            "db_queries": timer.count,
+            "db_duration_seconds": timer.seconds,
+            "render_duration_seconds": request._render_seconds,
+        }
+        if not response.streaming:
+            samples["response_bytes"] = len(response.content)
+        registry.observe(view, samples)
+
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={total * 1000:.1f}",
+            f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"',
+            f"render;dur={request._render_seconds * 1000:.1f}",
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render right after this hook returns
+        if hasattr(request, "_render_seconds"):
+            started = time.perf_counter()
+
+            def rendered(response):
+                request._render_seconds = time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,156 @@
+"""
+Database routing.
+
+ShardRouter places each user's expenses data on one of
+settings.DATABASE_SHARDS, chosen by a stable hash of the user id; auth and
+every other app stay on `default`. The shard comes from the instance being
+saved or, for querysets, from the user_shard()/on_shard() block around the
+call (ShardRoutingMiddleware opens one per API request).
+
+PrimaryReplicaRouter handles what is left: writes always go to `default`.
+Reads go to settings.DATABASE_REPLICA_ALIAS only inside a request that
+ReplicaRoutingMiddleware has marked as replica-safe; management commands,
+tests and everything else read from the primary.
+"""
+
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_read_alias = ContextVar("read_alias", default=None)
+_shard_alias = ContextVar("shard_alias", default=None)
+
+# Apps whose tables are split across the shards
+SHARDED_APPS = {"expenses"}
+
+
+class ShardNotSelected(RuntimeError):
+    pass
+
+
+def shard_aliases():
+    return getattr(settings, "DATABASE_SHARDS", [DEFAULT_DB_ALIAS])
+
+
+def shard_for_user(user_id):
+    """
+    The alias holding `user_id`'s data. A digest rather than hash() so the
+    mapping is the same in every process and across restarts.
+    """
+    shards = shard_aliases()
+    digest = hashlib.md5(str(user_id).encode()).digest()
+    return shards[int.from_bytes(digest[:8], "big") % len(shards)]
+
+
+@contextmanager
+def on_shard(alias):
+    """
+    Route sharded queries without an instance hint to `alias`.
+    """
+    token = _shard_alias.set(alias)
+    try:
+        yield
+    finally:
+        _shard_alias.reset(token)
+
+
+def user_shard(user_id):
+    return on_shard(shard_for_user(user_id))
+
+
+def replica_alias():
+    return getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+
+
+@contextmanager
+def reading_from(alias):
+    """
+    Route reads in this block (and this context only) to `alias`.
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def sticky_key(user_id):
+    return f"db:recent_write:{user_id}"
+
+
+def mark_recent_write(user_id):
+    """
+    Pin the user's reads to the primary until the replica has caught up.
+    """
+    cache.set(sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def wrote_recently(user_id):
+    return cache.get(sticky_key(user_id), False)
+
+
+class ShardRouter:
+
+    def route(self, model, hints):
+        if model._meta.app_label not in SHARDED_APPS or len(shard_aliases()) == 1:
+            return None
+
+        user_id = getattr(hints.get("instance"), "user_id", None)
+        if user_id is not None:
+            return shard_for_user(user_id)
+
+        alias = _shard_alias.get()
+        if alias is None:
+            raise ShardNotSelected(
+                f"No shard selected for {model._meta.label}; "
+                "wrap the call in user_shard() or on_shard()"
+            )
+        return alias
+
+    def db_for_read(self, model, **hints):
+        return self.route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self.route(model, hints)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != replica_alias()
+
+
+def sync_replica(alias=None):
+    """
+    Copy the primary SQLite database over the replica file with SQLite's
+    online backup API. Stands in for real replication locally and in tests.
+    """
+    alias = alias or replica_alias()
+    if alias is None:
+        raise ValueError("No replica database is configured")
+
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+
+    connections[alias].close()
+    target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -49,12 +50,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.middleware.ShardRoutingMiddleware',
+    'backend.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,13 +88,102 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite runs with a concurrency-oriented profile: WAL lets readers run
+# alongside the single writer, and IMMEDIATE transactions take the write
+# lock up front so busy_timeout can wait for it instead of failing with
+# "database is locked". Every value can be overridden from the environment;
+# DJANGO_SQLITE_TUNED=0 falls back to SQLite's defaults.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('DJANGO_SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.environ.get('DJANGO_SQLITE_SYNCHRONOUS', 'normal'),
+    # Negative sizes are KiB: 64 MiB page cache per connection
+    'cache_size': int(os.environ.get('DJANGO_SQLITE_CACHE_SIZE', -64000)),
+    'mmap_size': int(os.environ.get('DJANGO_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': os.environ.get('DJANGO_SQLITE_TEMP_STORE', 'memory'),
+    'busy_timeout': int(os.environ.get('DJANGO_SQLITE_BUSY_TIMEOUT_MS', 5000)),
+}
+
+SQLITE_OPTIONS = {
+    # Run on every new connection
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': os.environ.get('DJANGO_SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DJANGO_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': SQLITE_OPTIONS if os.environ.get('DJANGO_SQLITE_TUNED', '1') != '0' else {},
+        # Reuse connections across requests; the pragmas run once per connection
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Optional read replica. API GET requests read from it unless the user
+# wrote within REPLICA_STICKY_SECONDS (keep it above the replication lag).
+# The stickiness marker lives in the cache, so use a shared cache backend
+# with more than one worker. Locally the replica is a second SQLite file
+# refreshed by `manage.py sync_replica`.
+
+DATABASE_REPLICA_ALIAS = None
+
+if os.environ.get('DJANGO_SQLITE_REPLICA_PATH'):
+    DATABASE_REPLICA_ALIAS = 'replica'
+    DATABASES[DATABASE_REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DJANGO_SQLITE_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+# Per-user shards for the expenses tables. DJANGO_SQLITE_SHARDS=N keeps
+# default as the first shard and adds shard_1 .. shard_<N-1> next to it.
+# Auth stays on default; each user row is mirrored onto its shard so the
+# foreign keys hold. Run `manage.py rebalance_shards` after changing N.
+
+DATABASE_SHARDS = ['default']
+
+for index in range(1, int(os.environ.get('DJANGO_SQLITE_SHARDS', 1))):
+    DATABASES[f'shard_{index}'] = {
+        **DATABASES['default'],
+        'NAME': Path(os.environ.get('DJANGO_SQLITE_SHARD_DIR', BASE_DIR)) / f'shard_{index}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_SHARDS.append(f'shard_{index}')
+
+DATABASE_ROUTERS = [
+    'backend.routers.ShardRouter',
+    'backend.routers.PrimaryReplicaRouter',
+]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Read views cache their responses keyed on per-user data versions.
+# locmem is per process: use the file backend when running more than one worker.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.environ.get('DJANGO_CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', 10000)),
+        },
     }
 }
 
+# Seconds a cached read response is kept (versions make it stale sooner)
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,11 +231,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "backend.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "backend.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -150,4 +247,18 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_REFRESH_SERIALIZER": "backend.authentication.CachedTokenRefreshSerializer",
 }
+
+# Seconds an authenticated user stays cached (dropped early when it changes)
+AUTH_USER_CACHE_SECONDS = int(os.environ.get('AUTH_USER_CACHE_SECONDS', 60))
+
+# Seconds a refresh token's "not blacklisted" answer is cached
+AUTH_BLACKLIST_CACHE_SECONDS = int(os.environ.get('AUTH_BLACKLIST_CACHE_SECONDS', 30))
+
+# Request metrics: fraction of requests timed (0 turns it off) and how many
+# recent samples per view the p50/p95/p99 are taken from. Sampled requests
+# pay for a wrapper around every query, so only 1% are timed unless the
+# environment asks for more.
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 0.01))
+METRICS_WINDOW = int(os.environ.get('METRICS_WINDOW', 1000))
@@ -1,6 +1,11 @@
 from django.contrib import admin
-from .models import Expense, MonthlyIncome, Budget
+from backend.routers import shard_aliases
+from .models import Expense, MonthlyIncome, Budget, RecurringRule
 
-admin.site.register(Expense)
-admin.site.register(MonthlyIncome)
-admin.site.register(Budget)
+# Admin requests carry no user to pick a shard from, so with sharding on
+# these models are left out; use the shard-aware management commands.
+if len(shard_aliases()) == 1:
+    admin.site.register(Expense)
+    admin.site.register(MonthlyIncome)
+    admin.site.register(Budget)
+    admin.site.register(RecurringRule)
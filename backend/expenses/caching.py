@@ -0,0 +1,165 @@
+"""
+Versioned response cache for the read views.
+
+Every write to Expense, Budget or MonthlyIncome bumps a version counter
+for the (user, month) it touches and one for the user's whole ledger.
+A read view declares which of those versions its response depends on;
+together with the request path they make up both the ETag and the cache
+key, so a write never has to find and delete cached responses.
+"""
+import hashlib
+import time
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .pagination import PAGE_PARAMS
+
+# Version scope covering every month of a user's data (savings depend on all of them)
+LEDGER = "ledger"
+
+STATS = ("hits", "misses", "not_modified")
+
+
+def month_scope(month):
+    return f"{month:%Y-%m}"
+
+
+def version_key(user_id, scope):
+    return f"expenses:version:{user_id}:{scope}"
+
+
+def bump_versions(keys):
+    """
+    Invalidate everything cached for the given (user_id, month) pairs.
+    """
+    names = set()
+    for user_id, month in keys:
+        names.add(version_key(user_id, month_scope(month)))
+        names.add(version_key(user_id, LEDGER))
+
+    for name in names:
+        try:
+            cache.incr(name)
+        except ValueError:
+            # Start from the clock so a key lost to eviction never
+            # reuses a version an old ETag was built from
+            cache.set(name, time.time_ns(), None)
+
+
+def bump_versions_on_commit(using, keys):
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: bump_versions(keys), using=using)
+
+
+def get_versions(user_id, scopes):
+    names = [version_key(user_id, scope) for scope in scopes]
+    versions = cache.get_many(names)
+
+    for name in names:
+        if name not in versions:
+            cache.add(name, time.time_ns(), None)
+            versions[name] = cache.get(name)
+
+    return [versions[name] for name in names]
+
+
+def record(stat):
+    name = f"expenses:cache_stats:{stat}"
+    try:
+        cache.incr(name)
+    except ValueError:
+        cache.add(name, 0, None)
+        cache.incr(name)
+
+
+def cache_stats():
+    values = cache.get_many([f"expenses:cache_stats:{stat}" for stat in STATS])
+    return {stat: values.get(f"expenses:cache_stats:{stat}", 0) for stat in STATS}
+
+
+def request_month(request):
+    """
+    The month a read view is asked for via ?year=&month= (default: this month).
+    """
+    today = date.today()
+    year = int(request.query_params.get("year", today.year))
+    month = int(request.query_params.get("month", today.month))
+    return date(year, month, 1)
+
+
+def cached_response(scopes):
+    """
+    Cache a GET handler's response per user and data version, and answer
+    If-None-Match with 304 Not Modified when nothing has changed.
+
+    `scopes(request)` returns the version scopes the response depends on:
+    month_scope(...) values and/or LEDGER.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            user_id = request.user.pk
+            versions = get_versions(user_id, scopes(request))
+
+            digest = hashlib.md5(
+                f"{user_id}|{request.get_full_path()}|{versions}".encode()
+            ).hexdigest()
+            etag = f'"{digest}"'
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                record("not_modified")
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            key = f"expenses:response:{digest}"
+            data = cache.get(key)
+
+            if data is not None:
+                record("hits")
+                return Response(data, headers=headers)
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                record("misses")
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+                for header, value in headers.items():
+                    response[header] = value
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def this_month_scopes(request):
+    return [month_scope(date.today())]
+
+
+def current_month_scopes(request):
+    return [month_scope(request_month(request))]
+
+
+def expense_list_scopes(request):
+    # Keyset pages can span any number of months
+    if any(param in request.query_params for param in PAGE_PARAMS):
+        return [LEDGER]
+    return current_month_scopes(request)
+
+
+def month_and_previous_scopes(request):
+    month = request_month(request)
+    previous = date(month.year - 1, 12, 1) if month.month == 1 else month.replace(month=month.month - 1)
+    return [month_scope(previous), month_scope(month)]
+
+
+def ledger_scopes(request):
+    return [LEDGER]
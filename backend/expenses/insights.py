@@ -0,0 +1,80 @@
+"""
+Insight rules for InsightsView.
+
+A rule is a function registered with @insight_rule that takes a
+services.MonthData and yields insight dicts. Rules only look at the
+pre-fetched data, so adding one never adds a query.
+"""
+
+INSIGHT_RULES = []
+
+
+def insight_rule(func):
+    INSIGHT_RULES.append(func)
+    return func
+
+
+def evaluate(data):
+    insights = []
+    for rule in INSIGHT_RULES:
+        insights.extend(rule(data))
+    return insights
+
+
+# 🔹 Insight 1: Month-over-Month
+@insight_rule
+def month_comparison(data):
+    prev_total = data.previous_total_spent
+    if prev_total <= 0:
+        return
+
+    diff = data.total_spent - prev_total
+    percent = round((diff / prev_total) * 100, 1)
+
+    yield {
+        "type": "month_comparison",
+        "severity": "warning" if diff > 0 else "positive",
+        "message": f"You spent ₹{abs(diff)} ({abs(percent)}%) {'more' if diff > 0 else 'less'} than last month"
+    }
+
+
+# 🔹 Insight 2: Category budget almost used up
+@insight_rule
+def budget_warning(data):
+    for budget in data.budgets:
+        spent = data.spent_by_category.get(budget.category, 0)
+        percent = round((spent / budget.amount) * 100, 1) if budget.amount else 0
+
+        if percent >= 90:
+            yield {
+                "type": "budget_warning",
+                "severity": "danger",
+                "message": f"{budget.category.capitalize()} budget is at {percent}% usage"
+            }
+
+
+# 🔹 Insight 3: Single budget takes half the income
+@insight_rule
+def income_pressure(data):
+    income = data.income
+    if not income:
+        return
+
+    for budget in data.budgets:
+        if (budget.amount / income) >= 0.5:
+            yield {
+                "type": "income_pressure",
+                "severity": "warning",
+                "message": f"{budget.category.capitalize()} consumes {round((budget.amount/income)*100)}% of your income"
+            }
+
+
+# 🔹 Insight 4: Total budget exceeded
+@insight_rule
+def over_budget(data):
+    if data.income and data.total_budget > data.income:
+        yield {
+            "type": "over_budget",
+            "severity": "danger",
+            "message": "Your total budget exceeds your income"
+        }
@@ -0,0 +1,340 @@
+import io
+import json
+import platform
+import subprocess
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import resolve
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.metrics import QUANTILES, Summary
+from backend.middleware import QueryTimer
+from backend.routers import shard_aliases
+from expenses import urls
+from expenses.management.scratch_db import scratch_database
+from expenses.models import Budget, Expense, add_months
+
+
+API = "/api/"
+
+# p95 changes smaller than this are treated as noise by --baseline
+NOISE_MS = 1.0
+
+
+def routes(ctx):
+    """
+    (name, method, path, body) for every endpoint; body is a dict sent as
+    JSON, or a callable returning multipart data.
+    """
+    today = ctx["today"]
+    month = today.replace(day=1)
+    next_month = add_months(month, 1)
+    expense = {"amount": "12.50", "category": "food", "date": today.isoformat(), "note": "bench"}
+
+    return [
+        ("income", "GET", "income/", None),
+        ("income.set", "POST", "income/", {"amount": "55000"}),
+        ("expenses.month", "GET", "expenses/", None),
+        ("expenses.page", "GET", f"expenses/?from={ctx['first_month']}&limit=100", None),
+        ("expenses.create", "POST", "expenses/", expense),
+        ("expenses.batch", "POST", "expenses/batch/", {
+            "operations": [{"op": "create", "data": expense}] * 50
+        }),
+        ("expenses.import", "POST", "expenses/import/", lambda: {
+            "file": SimpleUploadedFile("bench.csv", ctx["import_csv"], "text/csv")
+        }),
+        ("expenses.export", "GET", "expenses/export/?format=csv", None),
+        ("expenses.update", "PUT", f"expenses/{ctx['expense_id']}/update/", expense),
+        ("expenses.delete", "DELETE", f"expenses/{ctx['expense_id']}/", None),
+        ("expenses.delete_alt", "DELETE", f"expenses/{ctx['expense_id']}/delete/", None),
+        ("expenses.generate_recurring", "POST", "expenses/generate-recurring/", {}),
+        ("dashboard", "GET", "dashboard/", None),
+        ("month", "GET", "month/", None),
+        ("budgets", "GET", "budgets/", None),
+        ("budgets.create", "POST", "budgets/", {
+            "year": next_month.year, "month": next_month.month,
+            "category": "food", "amount": "9000",
+        }),
+        ("budgets.bulk", "PUT", "budgets/bulk/", {
+            "year": next_month.year, "month": next_month.month,
+            "budgets": [
+                {"category": category, "amount": "5000"}
+                for category, _ in Budget.CATEGORY_CHOICES
+            ],
+        }),
+        ("budgets.copy", "POST", "budgets/copy/", {
+            "year": next_month.year, "month": next_month.month,
+        }),
+        ("budgets.update", "PUT", f"budgets/{ctx['budget_id']}/update/", {"amount": "7500"}),
+        ("budgets.delete", "DELETE", f"budgets/{ctx['budget_id']}/delete/", None),
+        ("insights", "GET", "insights/", None),
+        ("savings", "GET", "savings/", None),
+        ("savings.history", "GET", (
+            f"savings/history/?from={ctx['first_month']:%Y-%m}&to={month:%Y-%m}"
+        ), None),
+        ("register", "POST", "register/", {"username": "bench-new-user", "password": "bench-password"}),
+        ("cache.stats", "GET", "cache/stats/", "admin"),
+        ("metrics", "GET", "metrics/", "admin"),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API endpoint through the test client against scratch "
+        "databases seeded with seed_data at growing sizes. Reports latency "
+        "percentiles and query counts, writes them as JSON and can compare "
+        "against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--per-month",
+            default="20,100,400",
+            help="Comma-separated expenses per user per month, one run each",
+        )
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--years", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=20, help="Timed requests per endpoint")
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Keep the cache between requests (default: clear it before each)",
+        )
+        parser.add_argument("--only", help="Comma-separated endpoint names to run")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--baseline", help="Compare against this earlier JSON output")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed p95 slowdown against the baseline (0.25 = 25%%)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["per_month"].split(",")]
+        except ValueError:
+            raise CommandError("--per-month must be a comma-separated list of integers")
+
+        connection = connections["default"]
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+        if len(shard_aliases()) > 1:
+            raise CommandError("Run with a single shard")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        setup_test_environment()
+        try:
+            steps = [self.run_step(size, options) for size in sizes]
+        finally:
+            teardown_test_environment()
+            cache.clear()
+
+        result = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "users": options["users"],
+            "years": options["years"],
+            "repeat": options["repeat"],
+            "warm": options["warm"],
+            "steps": steps,
+        }
+
+        for step in steps:
+            self.report(step)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if baseline is not None:
+            regressions = compare(baseline, result, options["tolerance"])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def run_step(self, size, options):
+        with scratch_database(f"bench-{size}.sqlite3"):
+            return self.measure_step(size, options)
+
+    def measure_step(self, size, options):
+        call_command(
+            "seed_data",
+            users=options["users"],
+            years=options["years"],
+            per_month=size,
+            prefix="bench",
+            stdout=self.stdout if options["verbosity"] > 1 else io.StringIO(),
+        )
+
+        user = User.objects.get(username="bench-0")
+        admin = User.objects.create_user("bench-admin", password=None, is_staff=True)
+        today = date.today()
+        ctx = {
+            "today": today,
+            "first_month": Expense.objects.filter(user=user).earliest("date").date.replace(day=1),
+            "expense_id": Expense.objects.filter(user=user).latest("date").pk,
+            "budget_id": Budget.objects.filter(user=user).latest("month").pk,
+            "import_csv": (
+                "amount,category,date,note\n"
+                + "".join(f"{i + 1}.00,food,{today},imported\n" for i in range(200))
+            ).encode(),
+        }
+        tokens = {
+            None: f"Bearer {AccessToken.for_user(user)}",
+            "admin": f"Bearer {AccessToken.for_user(admin)}",
+        }
+
+        only = set(options["only"].split(",")) if options["only"] else None
+        table = [route for route in routes(ctx) if only is None or route[0] in only]
+        if only is None:
+            self.warn_uncovered(table)
+
+        client = Client()
+        results = {}
+        for name, method, path, body in table:
+            token = tokens["admin"] if body == "admin" else tokens[None]
+            body = None if body == "admin" else body
+            results[name] = self.measure(client, method, API + path, body, token, options)
+
+        return {
+            "per_month": size,
+            "expenses": Expense.objects.count(),
+            "routes": results,
+        }
+
+    def measure(self, client, method, path, body, token, options):
+        durations = Summary(options["repeat"])
+        statuses = set()
+        queries = 0
+
+        # One untimed request warms imports, connections and (with --warm) the cache
+        for attempt in range(options["repeat"] + 1):
+            if not options["warm"]:
+                cache.clear()
+
+            timer = QueryTimer()
+            with ExitStack() as stack:
+                if method != "GET":
+                    # Every write is rolled back so each run sees the same data
+                    for alias in connections:
+                        stack.enter_context(rollback(alias))
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timer))
+
+                started = time.perf_counter()
+                response = send(client, method, path, body, token)
+                elapsed = time.perf_counter() - started
+
+            if attempt:
+                durations.observe(elapsed * 1000)
+                statuses.add(response.status_code)
+                queries = max(queries, timer.count)
+
+        quantiles = durations.quantiles()
+        return {
+            "status": sorted(statuses),
+            **{f"p{int(q * 100)}_ms": round(quantiles[q], 3) for q in QUANTILES},
+            "mean_ms": round(durations.total / durations.count, 3),
+            "queries": queries,
+        }
+
+    def warn_uncovered(self, table):
+        covered = {resolve(API + path.split("?")[0]).route for _, _, path, _ in table}
+        for pattern in urls.urlpatterns:
+            if API.lstrip("/") + str(pattern.pattern) not in covered:
+                self.stderr.write(f"No benchmark for {API}{pattern.pattern}")
+
+    def report(self, step):
+        self.stdout.write(f"\n{step['per_month']} expenses/user/month ({step['expenses']} expenses)")
+        self.stdout.write(
+            f"{'endpoint':<28} {'status':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}"
+        )
+        for name, row in step["routes"].items():
+            status = ",".join(str(code) for code in row["status"])
+            line = (
+                f"{name:<28} {status:>7} {row['p50_ms']:>6.1f}ms {row['p95_ms']:>6.1f}ms "
+                f"{row['p99_ms']:>6.1f}ms {row['queries']:>8}"
+            )
+            if any(code >= 400 for code in row["status"]):
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+
+
+@contextmanager
+def rollback(alias):
+    with transaction.atomic(using=alias):
+        yield
+        transaction.set_rollback(True, using=alias)
+
+
+def send(client, method, path, body, token):
+    headers = {"HTTP_AUTHORIZATION": token}
+
+    if callable(body):
+        response = client.post(path, body(), **headers)
+    elif body is None:
+        response = client.generic(method, path, **headers)
+    else:
+        response = client.generic(
+            method, path, json.dumps(body), content_type="application/json", **headers
+        )
+
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def compare(baseline, result, tolerance):
+    """
+    Regressions of `result` against `baseline`: more queries, or a p95
+    slower than the tolerance allows, for the same endpoint and data size.
+    """
+    before = {step["per_month"]: step["routes"] for step in baseline.get("steps", [])}
+    regressions = []
+
+    for step in result["steps"]:
+        for name, row in step["routes"].items():
+            old = before.get(step["per_month"], {}).get(name)
+            if old is None:
+                continue
+            where = f"{name} @ {step['per_month']}/month"
+            if row["queries"] > old["queries"]:
+                regressions.append(f"{where}: {old['queries']} -> {row['queries']} queries")
+            slower = row["p95_ms"] - old["p95_ms"]
+            if slower > NOISE_MS and row["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{where}: p95 {old['p95_ms']:.1f}ms -> {row['p95_ms']:.1f}ms")
+
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
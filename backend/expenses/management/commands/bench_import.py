@@ -0,0 +1,60 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from backend.routers import shard_aliases
+from expenses.imports import import_expenses
+from expenses.management.scratch_db import scratch_database
+from expenses.models import Expense
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bulk import throughput (rows/sec) of a generated CSV file "
+        "into a scratch SQLite database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        connection = connections["default"]
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+        if len(shard_aliases()) > 1:
+            raise CommandError("Run with a single shard")
+
+        upload = self.generate(options["rows"], options["seed"])
+        try:
+            with scratch_database("import.sqlite3"):
+                user = User.objects.create_user(username="bench-import", password=None)
+                report = import_expenses(user, upload, "csv", batch_size=options["batch_size"])
+        finally:
+            upload.close()
+
+        self.stdout.write(
+            f"Imported {report['imported']} rows ({report['failed']} failed) "
+            f"in {report['elapsed_seconds']}s: {report['rows_per_sec']} rows/sec"
+        )
+
+    def generate(self, rows, seed):
+        rng = random.Random(seed)
+        categories = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+        start = date.today() - timedelta(days=730)
+
+        upload = TemporaryUploadedFile("bench.csv", "text/csv", 0, "utf-8")
+        upload.write(b"amount,category,date,note\n")
+        for i in range(rows):
+            day = start + timedelta(days=rng.randrange(730))
+            upload.write(
+                f"{rng.randrange(100, 500000) / 100:.2f},{rng.choice(categories)},"
+                f"{day.isoformat()},row {i}\n".encode()
+            )
+        upload.seek(0)
+        return upload
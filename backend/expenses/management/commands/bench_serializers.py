@@ -0,0 +1,98 @@
+import io
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+from backend import renderers
+from backend.routers import shard_aliases
+from expenses.management.scratch_db import scratch_database
+from expenses.models import Expense
+from expenses.serializers import ExpenseSerializer, expense_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare serializing and rendering an expense list with the DRF "
+        "ModelSerializer against the .values() fast path, rendered by the "
+        "stdlib JSONRenderer and by FastJSONRenderer (orjson)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the best is kept")
+
+    def handle(self, *args, **options):
+        connection = connections["default"]
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+        if len(shard_aliases()) > 1:
+            raise CommandError("Run with a single shard")
+
+        variants = [
+            ("ModelSerializer + json", self.model_serializer, JSONRenderer()),
+            ("values + json", expense_values.data, JSONRenderer()),
+        ]
+        if renderers.orjson is not None:
+            variants.append(("values + orjson", expense_values.data, renderers.FastJSONRenderer()))
+        else:
+            self.stderr.write("orjson is not installed; skipping the orjson variant")
+
+        with scratch_database("serializers.sqlite3"):
+            rows = self.seed(options["rows"])
+            results = [
+                (name, *self.measure(serialize, renderer, options["repeat"]))
+                for name, serialize, renderer in variants
+            ]
+
+        baseline = results[0][1] + results[0][2]
+        self.stdout.write(f"{rows} expenses, best of {options['repeat']}")
+        self.stdout.write(
+            f"{'variant':<24} {'serialize':>10} {'render':>9} {'total':>9} {'per row':>9} {'speedup':>8}"
+        )
+        for name, serialize_s, render_s in results:
+            total = serialize_s + render_s
+            self.stdout.write(
+                f"{name:<24} {serialize_s * 1000:>8.1f}ms {render_s * 1000:>7.1f}ms "
+                f"{total * 1000:>7.1f}ms {total / rows * 1e6:>7.2f}us {baseline / total:>7.2f}x"
+            )
+
+    def seed(self, rows):
+        # One user, one year: 12 months of rows / 12 expenses
+        call_command(
+            "seed_data",
+            users=1,
+            years=1,
+            per_month=-(-rows // 12),
+            recurring=0,
+            prefix="bench-serializers",
+            stdout=io.StringIO(),
+        )
+        self.user = User.objects.get(username="bench-serializers-0")
+        return Expense.objects.filter(user=self.user).count()
+
+    def model_serializer(self, queryset):
+        return ExpenseSerializer(queryset, many=True).data
+
+    def measure(self, serialize, renderer, repeat):
+        """
+        Best (serialize seconds, render seconds), querying included in
+        serialize.
+        """
+        best = None
+        for _ in range(repeat):
+            queryset = Expense.objects.filter(user=self.user)
+
+            started = time.perf_counter()
+            data = serialize(queryset)
+            serialized = time.perf_counter()
+            renderer.render(data)
+            rendered = time.perf_counter()
+
+            timing = (serialized - started, rendered - serialized)
+            if best is None or sum(timing) < sum(best):
+                best = timing
+        return best
@@ -0,0 +1,127 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test.utils import override_settings
+
+from backend.routers import user_shard
+from expenses.management.scratch_db import scratch_database
+from expenses.models import Expense
+
+
+def run_writer(user_ids, seconds, seed):
+    """
+    Create expenses for random users for `seconds`.
+    Returns (writes, lock errors).
+    """
+    rng = random.Random(seed)
+    categories = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+    today = date.today()
+
+    writes = 0
+    errors = 0
+    deadline = time.monotonic() + seconds
+
+    try:
+        while time.monotonic() < deadline:
+            user_id = rng.choice(user_ids)
+            try:
+                with user_shard(user_id):
+                    Expense.objects.create(
+                        user_id=user_id,
+                        amount=rng.randrange(100, 50000) / 100,
+                        category=rng.choice(categories),
+                        date=today - timedelta(days=rng.randrange(60)),
+                    )
+            except OperationalError:
+                errors += 1
+                continue
+            writes += 1
+    finally:
+        connections.close_all()
+
+    return writes, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure expense write throughput against 1..N scratch SQLite shards "
+        "with the same number of concurrent writer processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shards",
+            default="1,2,4",
+            help="Comma-separated shard counts to compare",
+        )
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--users", type=int, default=100)
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(count) for count in options["shards"].split(",")]
+        except ValueError:
+            raise CommandError("--shards must be a comma-separated list of integers")
+
+        default = connections[DEFAULT_DB_ALIAS]
+        if default.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+
+        results = []
+        for count in counts:
+            with scratch_database("default.sqlite3") as path:
+                results.append((count, self.run(path.parent, count, options)))
+
+        baseline = results[0][1][0] or 1
+        self.stdout.write(f"{'shards':>6} {'writes/s':>9} {'errors':>7} {'speedup':>8}")
+        for count, (rate, errors) in results:
+            self.stdout.write(f"{count:>6} {rate:>9.1f} {errors:>7} {rate / baseline:>7.2f}x")
+
+    def run(self, tmp, count, options):
+        aliases = [DEFAULT_DB_ALIAS] + [f"bench_shard_{i}" for i in range(1, count)]
+
+        # The default database is already a migrated scratch file in tmp
+        default = connections[DEFAULT_DB_ALIAS].settings_dict
+        for alias in aliases[1:]:
+            connections.settings[alias] = {**default, "NAME": str(tmp / f"{alias}.sqlite3")}
+
+        try:
+            with override_settings(DATABASE_SHARDS=aliases):
+                for alias in aliases[1:]:
+                    call_command("migrate", database=alias, verbosity=0)
+
+                user_ids = [
+                    User.objects.create_user(username=f"bench-shards-{i}", password=None).pk
+                    for i in range(options["users"])
+                ]
+                # Children must open their own connections after the fork
+                connections.close_all()
+
+                with ProcessPoolExecutor(
+                    max_workers=options["writers"],
+                    mp_context=multiprocessing.get_context("fork"),
+                ) as pool:
+                    outcomes = list(pool.map(
+                        run_writer,
+                        [user_ids] * options["writers"],
+                        [options["seconds"]] * options["writers"],
+                        range(options["writers"]),
+                    ))
+        finally:
+            connections.close_all()
+            for alias in aliases[1:]:
+                del connections.settings[alias]
+                if hasattr(connections._connections, alias):
+                    delattr(connections._connections, alias)
+
+        writes = sum(w for w, _ in outcomes)
+        errors = sum(e for _, e in outcomes)
+        return writes / options["seconds"], errors
@@ -0,0 +1,144 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from backend.routers import shard_aliases
+from expenses.management.scratch_db import scratch_database
+from expenses.models import Expense, MonthlyIncome
+from expenses.services import calculate_savings, load_month_data
+
+
+def run_worker(role, user_ids, seconds, seed):
+    """
+    Hammer the database for `seconds` as a dashboard reader or an expense
+    writer. Returns (operations, lock errors, latencies in ms).
+    """
+    rng = random.Random(seed)
+    categories = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+    today = date.today()
+
+    ops = 0
+    errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+
+    try:
+        while time.monotonic() < deadline:
+            user = User(pk=rng.choice(user_ids))
+            started = time.perf_counter()
+            try:
+                if role == "reader":
+                    load_month_data(user, today.year, today.month)
+                    calculate_savings(user, today.year, today.month)
+                else:
+                    Expense.objects.create(
+                        user=user,
+                        amount=rng.randrange(100, 50000) / 100,
+                        category=rng.choice(categories),
+                        date=today - timedelta(days=rng.randrange(60)),
+                    )
+            except OperationalError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            ops += 1
+    finally:
+        connections.close_all()
+
+    return ops, errors, latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent read/write benchmark of the SQLite connection profile: "
+        "runs dashboard readers and expense writers against a scratch database "
+        "with SQLite's defaults, then with settings.SQLITE_OPTIONS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--rows", type=int, default=200, help="Seed expenses per user")
+
+    def handle(self, *args, **options):
+        connection = connections["default"]
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+        if len(shard_aliases()) > 1:
+            raise CommandError("Run with a single shard; see bench_shards for sharded writes")
+
+        profiles = [("defaults", {}), ("tuned", settings.SQLITE_OPTIONS)]
+        results = []
+        for name, profile_options in profiles:
+            with scratch_database(f"{name}.sqlite3", options=profile_options):
+                results.append((name, self.run_profile(options)))
+
+        self.stdout.write(
+            f"{'profile':<10} {'reads/s':>9} {'writes/s':>9} {'errors':>7} "
+            f"{'read p95':>9} {'write p95':>10}"
+        )
+        for name, result in results:
+            self.stdout.write(
+                f"{name:<10} {result['reader']['rate']:>9.1f} {result['writer']['rate']:>9.1f} "
+                f"{result['reader']['errors'] + result['writer']['errors']:>7} "
+                f"{result['reader']['p95']:>7.1f}ms {result['writer']['p95']:>8.1f}ms"
+            )
+
+    def run_profile(self, options):
+        user_ids = self.seed(options["users"], options["rows"])
+        # Children must open their own connections after the fork
+        connections.close_all()
+
+        roles = ["reader"] * options["readers"] + ["writer"] * options["writers"]
+        with ProcessPoolExecutor(
+            max_workers=len(roles),
+            mp_context=multiprocessing.get_context("fork"),
+        ) as pool:
+            futures = [
+                (role, pool.submit(run_worker, role, user_ids, options["seconds"], seed))
+                for seed, role in enumerate(roles)
+            ]
+            outcomes = [(role, future.result()) for role, future in futures]
+
+        result = {}
+        for role in ("reader", "writer"):
+            ops = sum(o for r, (o, _, _) in outcomes if r == role)
+            errors = sum(e for r, (_, e, _) in outcomes if r == role)
+            latencies = sorted(ms for r, (_, _, lat) in outcomes if r == role for ms in lat)
+            result[role] = {
+                "rate": ops / options["seconds"],
+                "errors": errors,
+                "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            }
+        return result
+
+    def seed(self, users, rows):
+        rng = random.Random(0)
+        categories = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+        today = date.today()
+        month_start = today.replace(day=1)
+
+        user_ids = []
+        for i in range(users):
+            user = User.objects.create_user(username=f"bench-sqlite-{i}", password=None)
+            user_ids.append(user.pk)
+            MonthlyIncome.objects.create(user=user, month=month_start, amount=100000)
+            Expense.objects.bulk_create(
+                Expense(
+                    user=user,
+                    amount=rng.randrange(100, 50000) / 100,
+                    category=rng.choice(categories),
+                    date=today - timedelta(days=rng.randrange(365)),
+                )
+                for _ in range(rows)
+            )
+        return user_ids
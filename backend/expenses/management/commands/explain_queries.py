@@ -0,0 +1,167 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from backend.routers import shard_aliases, shard_for_user, user_shard
+from expenses.models import Expense, add_months
+
+
+# Read endpoints and the query strings they are hit with; the
+# placeholders are filled in from --month.
+ENDPOINTS = [
+    "/api/income/?year={year}&month={month}",
+    "/api/expenses/",
+    "/api/expenses/?from={from}&to={to}&limit=50",
+    "/api/expenses/export/?format=csv",
+    "/api/dashboard/?year={year}&month={month}",
+    "/api/month/?year={year}&month={month}",
+    "/api/budgets/?year={year}&month={month}",
+    "/api/insights/?year={year}&month={month}",
+    "/api/savings/?year={year}&month={month}",
+    "/api/savings/history/?from={from_month}&to={to_month}",
+]
+
+# Plan lines that mean a table is read without an index
+FULL_SCAN_MARKERS = {
+    "sqlite": ("SCAN ",),
+    "postgresql": ("Seq Scan",),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Hit every read endpoint as one user, then print the query plan of "
+        "each SELECT it ran and flag full table scans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Username to query as (default: the user with the most expenses)",
+        )
+        parser.add_argument(
+            "--month",
+            help="Month to query as YYYY-MM (default: current month)",
+        )
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error if any full table scan is found",
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+
+        # The user's expenses data lives on their shard
+        connection = connections[shard_for_user(user.pk)]
+        if connection.vendor not in FULL_SCAN_MARKERS:
+            raise CommandError(f"EXPLAIN output for {connection.vendor} is not supported")
+
+        if options["month"]:
+            try:
+                year, month = (int(part) for part in options["month"].split("-"))
+                month_start = date(year, month, 1)
+            except ValueError:
+                raise CommandError("--month must be YYYY-MM")
+        else:
+            month_start = date.today().replace(day=1)
+
+        params = {
+            "year": month_start.year,
+            "month": month_start.month,
+            "from": f"{add_months(month_start, -11):%Y-%m-%d}",
+            "to": f"{add_months(month_start, 1):%Y-%m-%d}",
+            "from_month": f"{add_months(month_start, -11):%Y-%m}",
+            "to_month": f"{month_start:%Y-%m}",
+        }
+
+        client = APIClient()
+        client.force_authenticate(user)
+
+        scans = 0
+
+        # A private, empty response cache so every endpoint reaches the database
+        with override_settings(
+            ALLOWED_HOSTS=["*"],
+            CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "explain-queries",
+            }},
+        ):
+            for template in ENDPOINTS:
+                path = template.format(**params)
+                with user_shard(user.pk), CaptureQueriesContext(connection) as queries:
+                    response = client.get(path)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"GET {path} -> {response.status_code} ({len(queries)} queries)"
+                ))
+                for query in queries.captured_queries:
+                    scans += self.explain(connection, query["sql"])
+
+        if scans:
+            message = f"{scans} queries use a full table scan"
+            if options["fail_on_scan"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No full table scans"))
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username!r}")
+
+        # auth_user and the expenses tables may be on different shards,
+        # so find the busiest user per shard and look them up separately
+        busiest = []
+        for alias in shard_aliases():
+            row = (
+                Expense.objects.using(alias)
+                .order_by()
+                .values("user_id")
+                .annotate(n=Count("id"))
+                .order_by("-n")
+                .first()
+            )
+            if row is not None:
+                busiest.append((row["n"], row["user_id"]))
+
+        if not busiest:
+            raise CommandError("No user with expenses; pass --user")
+        return User.objects.get(pk=max(busiest)[1])
+
+    def explain(self, connection, sql):
+        """
+        Print the plan for one captured statement; returns 1 if it scans.
+        """
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return 0
+
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            plan = [str(row[-1]) for row in cursor.fetchall()]
+
+        scans = [
+            line for line in plan
+            if any(marker in line for marker in FULL_SCAN_MARKERS[connection.vendor])
+            and "USING" not in line
+        ]
+
+        self.stdout.write(f"  {sql}")
+        for line in plan:
+            style = self.style.ERROR if line in scans else (lambda text: text)
+            self.stdout.write(style(f"    {line}"))
+
+        return 1 if scans else 0
+
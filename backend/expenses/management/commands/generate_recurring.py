@@ -0,0 +1,132 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models.functions import Mod
+
+from backend.routers import on_shard, shard_aliases
+from expenses.models import RecurringRule
+from expenses.services import generate_due_expenses
+
+
+def sweep_shard(shard, shards, today, chunk_size, alias):
+    """
+    Generate due expenses for the users on database `alias` with
+    user_id % shards == shard. Each chunk of rules is committed in its own
+    transaction, so an interrupted sweep can simply be re-run.
+    """
+    due = RecurringRule.objects.using(alias).filter(is_active=True, next_due__lte=today)
+    if shards > 1:
+        due = due.annotate(shard=Mod("user_id", shards)).filter(shard=shard)
+
+    rules = 0
+    rows = 0
+    last_pk = 0
+
+    try:
+        while True:
+            with on_shard(alias):
+                chunk, inserted = run_chunk(due, last_pk, today, chunk_size)
+            if not chunk:
+                break
+
+            rules += len(chunk)
+            rows += inserted
+            last_pk = chunk[-1].pk
+    finally:
+        connections.close_all()
+
+    return rules, rows
+
+
+def run_chunk(due, last_pk, today, chunk_size, attempts=5):
+    """
+    Process the next chunk of due rules in one transaction.
+
+    SQLite fails a deferred transaction outright when two workers try to
+    upgrade their read locks at once; the transaction has rolled back by
+    then, so the chunk is simply retried.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic(using=due.db):
+                chunk = list(
+                    due.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")[:chunk_size]
+                )
+                return chunk, generate_due_expenses(chunk, today)
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate every recurring expense due across all users. "
+        "Meant to run nightly; safe to re-run for the same date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Generate everything due on or before this date (YYYY-MM-DD, default today)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes; users are sharded across them",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Rules processed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options["date"]) if options["date"] else date.today()
+        except ValueError:
+            raise CommandError("--date must be in YYYY-MM-DD format")
+
+        workers = options["workers"]
+        chunk_size = options["chunk_size"]
+        if workers < 1 or chunk_size < 1:
+            raise CommandError("--workers and --chunk-size must be at least 1")
+
+        started = time.monotonic()
+
+        results = []
+        for alias in shard_aliases():
+            if workers == 1:
+                results.append(sweep_shard(0, 1, today, chunk_size, alias))
+                continue
+
+            # Children must open their own database connections
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results.extend(pool.map(
+                    sweep_shard,
+                    range(workers),
+                    [workers] * workers,
+                    [today] * workers,
+                    [chunk_size] * workers,
+                    [alias] * workers,
+                ))
+
+        elapsed = time.monotonic() - started
+        rules = sum(result[0] for result in results)
+        rows = sum(result[1] for result in results)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {rules} rules and inserted {rows} expenses "
+            f"in {elapsed:.2f}s ({rules / elapsed if elapsed else 0:.0f} rules/sec, "
+            f"{rows / elapsed if elapsed else 0:.0f} rows/sec)"
+        ))
@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from backend.authentication import BLACKLIST_APP
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted refresh tokens. "
+        "Meant to run daily when the token_blacklist app is enabled."
+    )
+
+    def handle(self, *args, **options):
+        if not apps.is_installed(BLACKLIST_APP):
+            self.stdout.write(f"{BLACKLIST_APP} is not installed; nothing to prune")
+            return
+
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+        # Blacklist entries cascade with their outstanding token
+        _, deleted = OutstandingToken.objects.filter(expires_at__lte=aware_utcnow()).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted.get(OutstandingToken._meta.label, 0)} outstanding and "
+            f"{deleted.get(BlacklistedToken._meta.label, 0)} blacklisted tokens"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from backend.routers import shard_aliases, shard_for_user
+from expenses.sharding import misplaced_users, missing_mirrors, move_user
+from expenses.signals import mirror_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every user's expenses data onto the shard their id hashes to "
+        "(after changing the shard count) and mirror missing user rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would move",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        mirrors = missing_mirrors()
+        for user in mirrors:
+            if not dry_run:
+                mirror_user(user, shard_for_user(user.pk))
+        self.stdout.write(f"{'Would mirror' if dry_run else 'Mirrored'} {len(mirrors)} users")
+
+        moves = misplaced_users()
+        rows = 0
+        for user_id, (source, target) in sorted(moves.items()):
+            self.stdout.write(f"user={user_id}: {source} -> {target}")
+            if not dry_run:
+                rows += move_user(user_id, source, target)
+
+        if dry_run:
+            self.stdout.write(f"Would move {len(moves)} users across {len(shard_aliases())} shards")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Moved {len(moves)} users ({rows} expenses) across {len(shard_aliases())} shards"
+            ))
@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from backend.routers import on_shard, shard_aliases
+from expenses.models import Expense, SpendingRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or verify) the spending rollups from the raw expense rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare rollups with the raw rows; don't write anything",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Limit to this user id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            with on_shard(alias):
+                self.handle_shard(alias, options)
+
+    def handle_shard(self, alias, options):
+        expenses = Expense.objects.all()
+        rollups = SpendingRollup.objects.all()
+
+        if options["users"]:
+            expenses = expenses.filter(user_id__in=options["users"])
+            rollups = rollups.filter(user_id__in=options["users"])
+
+        with transaction.atomic(using=alias):
+            expected = expenses.rollup_totals()
+
+            if options["verify"]:
+                self.verify(expected, rollups)
+                return
+
+            rollups.delete()
+            SpendingRollup.objects.bulk_create(
+                [
+                    SpendingRollup(
+                        user_id=user_id,
+                        month=month,
+                        category=category,
+                        total=total,
+                        expense_count=count
+                    )
+                    for (user_id, month, category), (total, count) in expected.items()
+                ],
+                batch_size=1000
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(expected)} rollup rows"
+        ))
+
+    def verify(self, expected, rollups):
+        actual = {
+            (row.user_id, row.month, row.category): (row.total, row.expense_count)
+            for row in rollups
+        }
+
+        drift = 0
+        for key in sorted(expected.keys() | actual.keys(), key=str):
+            want = expected.get(key, (0, 0))
+            have = actual.get(key, (0, 0))
+            if want != have:
+                drift += 1
+                user_id, month, category = key
+                self.stdout.write(
+                    f"user={user_id} month={month:%Y-%m} category={category}: "
+                    f"expected {want[0]} / {want[1]}, found {have[0]} / {have[1]}"
+                )
+
+        if drift:
+            raise CommandError(f"{drift} rollup rows out of date")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"All {len(expected)} rollup rows match"
+        ))
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.routers import on_shard, shard_aliases
+from expenses.models import add_months
+from expenses.services import rollforward_budgets
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy every user's budgets from the previous month into the given "
+        "month (default: the current one). Budgets already set are kept, "
+        "so the command is safe to run more than once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            help="Target month as YYYY-MM (default: current month)",
+        )
+
+    def handle(self, *args, **options):
+        if options["month"]:
+            try:
+                year, month = (int(part) for part in options["month"].split("-"))
+                target = date(year, month, 1)
+            except ValueError:
+                raise CommandError("--month must be YYYY-MM")
+        else:
+            target = date.today().replace(day=1)
+
+        copied = 0
+        for alias in shard_aliases():
+            with on_shard(alias):
+                copied += rollforward_budgets(target)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {copied} budgets from {add_months(target, -1):%Y-%m} to {target:%Y-%m}"
+        ))
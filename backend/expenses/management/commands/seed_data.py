@@ -0,0 +1,157 @@
+import random
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+
+from backend.routers import shard_for_user, user_shard
+from expenses.models import (
+    Budget,
+    Expense,
+    MonthlyIncome,
+    RecurringRule,
+    add_months,
+    apply_expense_deltas,
+    expense_deltas,
+)
+from expenses.signals import mirror_user
+
+
+CATEGORIES = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+BUDGET_CATEGORIES = [choice for choice, _ in Budget.CATEGORY_CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with income, budgets, recurring items and "
+        "expenses (users x years x expenses per month) using bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--years", type=int, default=2)
+        parser.add_argument("--per-month", type=int, default=60, help="Expenses per user per month")
+        parser.add_argument("--recurring", type=int, default=2, help="Recurring items per user")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Username prefix; seeded users are <prefix>-<n>",
+        )
+        parser.add_argument(
+            "--password",
+            default="seed-password",
+            help="Password given to every seeded user",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete users with this prefix (and their data) first",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["years"]) < 1 or options["per_month"] < 0:
+            raise CommandError("--users and --years must be at least 1, --per-month at least 0")
+
+        prefix = options["prefix"]
+        started = time.monotonic()
+
+        if options["clear"]:
+            deleted, _ = User.objects.filter(username__startswith=f"{prefix}-").delete()
+            self.stdout.write(f"Deleted {deleted} rows of earlier {prefix} data")
+
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users named {prefix}-* already exist; pass --clear")
+
+        rng = random.Random(options["seed"])
+        first_month = add_months(date.today().replace(day=1), -(options["years"] * 12 - 1))
+        months = [add_months(first_month, i) for i in range(options["years"] * 12)]
+
+        password = make_password(options["password"])
+        users = User.objects.bulk_create(
+            User(username=f"{prefix}-{i}", password=password)
+            for i in range(options["users"])
+        )
+
+        rows = 0
+        for user in users:
+            # bulk_create skips the post_save signal that mirrors users
+            alias = shard_for_user(user.pk)
+            if alias != DEFAULT_DB_ALIAS:
+                mirror_user(user, alias)
+
+            with user_shard(user.pk):
+                rows += self.seed_user(user, months, rng, options)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users with {rows} rows over {len(months)} months "
+            f"in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/sec)"
+        ))
+
+    def seed_user(self, user, months, rng, options):
+        using = router.db_for_write(Expense)
+
+        with transaction.atomic(using=using):
+            incomes = MonthlyIncome.objects.bulk_create(
+                MonthlyIncome(user=user, month=month, amount=money(rng, 40000, 120000))
+                for month in months
+            )
+
+            budgets = Budget.objects.bulk_create(
+                Budget(user=user, month=month, category=category, amount=money(rng, 2000, 20000))
+                for month in months
+                for category in BUDGET_CATEGORIES
+            )
+
+            rules = RecurringRule.objects.bulk_create(
+                RecurringRule(
+                    user=user,
+                    amount=money(rng, 500, 30000),
+                    category=rng.choice(CATEGORIES),
+                    note=f"Recurring {i}",
+                    day_of_month=rng.randint(1, 28),
+                    next_due=add_months(months[-1], 1),
+                )
+                for i in range(options["recurring"])
+            )
+
+            expenses = [
+                Expense(
+                    user=user,
+                    amount=rule.amount,
+                    category=rule.category,
+                    date=rule.due_date(month),
+                    note=rule.note,
+                    is_recurring=True,
+                    recurrence_day=rule.day_of_month,
+                    rule=rule,
+                )
+                for rule in rules
+                for month in months
+            ]
+            for month in months:
+                last_day = add_months(month, 1).toordinal() - month.toordinal()
+                expenses += [
+                    Expense(
+                        user=user,
+                        amount=money(rng, 50, 5000),
+                        category=rng.choice(CATEGORIES),
+                        date=month.replace(day=rng.randint(1, last_day)),
+                    )
+                    for _ in range(options["per_month"])
+                ]
+
+            # Rollups and savings snapshots are updated once per user
+            Expense.objects.bulk_create(expenses, batch_size=1000, maintain_rollups=False)
+            apply_expense_deltas(using, expense_deltas(expenses))
+
+        return len(incomes) + len(budgets) + len(rules) + len(expenses)
+
+
+def money(rng, low, high):
+    return Decimal(rng.randrange(low * 100, high * 100)) / 100
@@ -0,0 +1,262 @@
+import io
+import json
+import logging
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connections
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.metrics import QUANTILES, Summary
+from backend.routers import replica_alias, shard_aliases
+from backend.wsgi import application
+from expenses.management.scratch_db import scratch_database
+
+
+# Requests the dashboard page makes on load
+PAGES = {
+    # Before the month/ bundle: one GET per panel
+    "classic": ["/api/dashboard/", "/api/expenses/", "/api/budgets/", "/api/insights/"],
+    "bundle": ["/api/month/"],
+}
+
+_lock_errors = threading.local()
+
+
+def note_lock_error(sender, **kwargs):
+    """
+    got_request_exception receiver counting "database is locked" failures
+    of the requests made by this thread.
+    """
+    exc = sys.exc_info()[1]
+    if isinstance(exc, OperationalError) and "locked" in str(exc):
+        _lock_errors.count = getattr(_lock_errors, "count", 0) + 1
+
+
+def call(method, path, token, body=None):
+    """
+    Send one request straight to the WSGI application.
+    Returns (endpoint, seconds, status, locked).
+    """
+    path, _, query = path.partition("?")
+    payload = json.dumps(body).encode() if body is not None else b""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(payload)),
+        "HTTP_AUTHORIZATION": f"Bearer {token}",
+        "wsgi.input": io.BytesIO(payload),
+    }
+    setup_testing_defaults(environ)
+
+    status = []
+    _lock_errors.count = 0
+    started = time.perf_counter()
+
+    result = application(environ, lambda line, headers, exc_info=None: status.append(int(line[:3])))
+    try:
+        for _ in result:
+            pass
+    finally:
+        result.close()
+
+    return f"{method} {path}", time.perf_counter() - started, status[0], _lock_errors.count > 0
+
+
+def run_worker(tokens, seconds, seed, page, write_ratio):
+    """
+    Act as one user session for `seconds`: page loads (generate-recurring
+    plus the page's GETs) mixed with expense writes, each followed by the
+    dashboard refresh the expense form does.
+    Returns [(kind, endpoint, seconds, status, locked)].
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    samples = []
+    deadline = time.monotonic() + seconds
+
+    try:
+        while time.monotonic() < deadline:
+            token = rng.choice(tokens)
+
+            if rng.random() < write_ratio:
+                kind = "write"
+                requests = [
+                    ("POST", "/api/expenses/", {
+                        "amount": f"{rng.randrange(100, 50000) / 100:.2f}",
+                        "category": "food",
+                        "date": today.isoformat(),
+                    }),
+                    ("GET", "/api/dashboard/", None),
+                ]
+            else:
+                kind = "page"
+                requests = [("POST", "/api/expenses/generate-recurring/", None)]
+                requests += [("GET", path, None) for path in PAGES[page]]
+
+            started = time.perf_counter()
+            failed = locked = False
+            for method, path, body in requests:
+                sample = call(method, path, token, body)
+                samples.append((kind, *sample))
+                failed |= sample[2] >= 500
+                locked |= sample[3]
+
+            samples.append((kind, f"{kind} total", time.perf_counter() - started, 500 if failed else 200, locked))
+    finally:
+        connections.close_all()
+
+    return samples
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress backend.wsgi.application with concurrent sessions mixing "
+        "dashboard page loads and expense writes on a seeded scratch copy of "
+        "the SQLite database, and report throughput, tail latency and the "
+        "rate of 'database is locked' errors. Uses the configured connection "
+        "settings, so compare e.g. DJANGO_SQLITE_TUNED=0 against the default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--mode", choices=["thread", "process"], default="process")
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--page", choices=sorted(PAGES), default="classic")
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.3,
+            help="Share of session actions that add an expense instead of loading the page",
+        )
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--per-month", type=int, default=30, help="Seeded expenses per user per month")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        connection = connections["default"]
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+        if len(shard_aliases()) > 1 or replica_alias() is not None:
+            raise CommandError("Run with a single shard and no replica")
+
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+
+        got_request_exception.connect(note_lock_error)
+        # Every failed request would otherwise log a traceback
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with scratch_database("stress.sqlite3"):
+                samples, elapsed = self.run(options)
+        finally:
+            got_request_exception.disconnect(note_lock_error)
+            request_logger.setLevel(level)
+
+        rows = summarize(samples, elapsed)
+        self.report(rows, options)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({
+                    "workers": options["workers"],
+                    "mode": options["mode"],
+                    "page": options["page"],
+                    "write_ratio": options["write_ratio"],
+                    "seconds": elapsed,
+                    "sqlite_options": connection.settings_dict.get("OPTIONS", {}),
+                    "endpoints": rows,
+                }, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def run(self, options):
+        call_command(
+            "seed_data",
+            users=options["users"],
+            years=1,
+            per_month=options["per_month"],
+            prefix="stress",
+            stdout=io.StringIO(),
+        )
+        tokens = [
+            str(AccessToken.for_user(user))
+            for user in User.objects.filter(username__startswith="stress-")
+        ]
+        # Workers must open their own connections
+        connections.close_all()
+
+        if options["mode"] == "process":
+            pool = ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=options["workers"])
+
+        started = time.monotonic()
+        with pool:
+            results = list(pool.map(
+                run_worker,
+                [tokens] * options["workers"],
+                [options["seconds"]] * options["workers"],
+                range(options["workers"]),
+                [options["page"]] * options["workers"],
+                [options["write_ratio"]] * options["workers"],
+            ))
+        elapsed = time.monotonic() - started
+
+        return [sample for result in results for sample in result], elapsed
+
+    def report(self, rows, options):
+        self.stdout.write(
+            f"{options['workers']} {options['mode']} workers, {options['page']} page, "
+            f"{options['write_ratio']:.0%} writes"
+        )
+        self.stdout.write(
+            f"{'endpoint':<42} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'errors':>7} {'locked':>7}"
+        )
+        for name, row in rows.items():
+            self.stdout.write(
+                f"{name:<42} {row['rate']:>7.1f} {row['p50_ms']:>6.1f}ms {row['p95_ms']:>6.1f}ms "
+                f"{row['p99_ms']:>6.1f}ms {row['error_rate']:>7.2%} {row['lock_rate']:>7.2%}"
+            )
+
+
+def summarize(samples, elapsed):
+    """
+    Per-endpoint throughput, latency quantiles and error rates, with the
+    page-load and write totals last.
+    """
+    groups = {}
+    for kind, endpoint, seconds, status, locked in samples:
+        groups.setdefault(endpoint, []).append((seconds, status, locked))
+
+    rows = {}
+    for endpoint in sorted(groups, key=lambda name: (name.endswith(" total"), name)):
+        values = groups[endpoint]
+        durations = Summary(len(values))
+        for seconds, _, _ in values:
+            durations.observe(seconds * 1000)
+        quantiles = durations.quantiles()
+
+        rows[endpoint] = {
+            "requests": len(values),
+            "rate": len(values) / elapsed,
+            **{f"p{int(q * 100)}_ms": round(quantiles[q], 3) for q in QUANTILES},
+            "error_rate": sum(status >= 500 for _, status, _ in values) / len(values),
+            "lock_rate": sum(locked for _, _, locked in values) / len(values),
+        }
+    return rows
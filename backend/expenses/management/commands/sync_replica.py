@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.routers import replica_alias, sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto the replica file "
+        "(local stand-in for replication)."
+    )
+
+    def handle(self, *args, **options):
+        if replica_alias() is None:
+            raise CommandError("Set DJANGO_SQLITE_REPLICA_PATH to configure a replica")
+
+        sync_replica()
+        self.stdout.write(self.style.SUCCESS(f"Replica '{replica_alias()}' is up to date"))
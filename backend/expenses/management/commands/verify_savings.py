@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from backend.routers import on_shard, shard_aliases
+from expenses.models import (
+    Expense,
+    MonthlyIncome,
+    SavingsSnapshot,
+    income_totals,
+    recompute_savings,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute every savings snapshot from the raw income and expenses and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Overwrite drifted snapshots with the recomputed balance",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Limit to this user id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            with on_shard(alias):
+                self.handle_shard(alias, options)
+
+    def handle_shard(self, alias, options):
+        snapshots = SavingsSnapshot.objects.order_by("user_id", "month")
+        incomes = MonthlyIncome.objects.all()
+        expenses = Expense.objects.all()
+
+        if options["users"]:
+            snapshots = snapshots.filter(user_id__in=options["users"])
+            incomes = incomes.filter(user_id__in=options["users"])
+            expenses = expenses.filter(user_id__in=options["users"])
+
+        spending = (
+            expenses.order_by()
+            .annotate(month=TruncMonth("date"))
+            .values("user_id", "month")
+            .annotate(total=Sum("amount"))
+        )
+        spending = {(row["user_id"], row["month"]): row["total"] for row in spending}
+
+        with transaction.atomic(using=alias):
+            drifted = []
+            checked = 0
+
+            for snapshot, expected in recompute_savings(
+                snapshots.select_for_update(), income_totals(incomes), spending
+            ):
+                checked += 1
+                if expected != snapshot.savings_balance:
+                    self.stdout.write(
+                        f"user={snapshot.user_id} month={snapshot.month:%Y-%m}: "
+                        f"expected {expected}, found {snapshot.savings_balance}"
+                    )
+                    snapshot.savings_balance = expected
+                    drifted.append(snapshot)
+
+            if drifted and options["fix"]:
+                SavingsSnapshot.objects.bulk_update(drifted, ["savings_balance"], batch_size=500)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Fixed {len(drifted)} of {checked} snapshots"
+                ))
+                return
+
+        if drifted:
+            raise CommandError(f"{len(drifted)} of {checked} snapshots have drifted")
+
+        self.stdout.write(self.style.SUCCESS(f"All {checked} snapshots match"))
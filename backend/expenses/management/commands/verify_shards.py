@@ -0,0 +1,34 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.routers import shard_aliases
+from expenses.sharding import misplaced_users, missing_mirrors
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that every user's data is on the shard their id hashes to, "
+        "that their user row is mirrored there, and that each shard's "
+        "rollups and savings snapshots match its raw rows."
+    )
+
+    def handle(self, *args, **options):
+        problems = 0
+
+        for user_id, (source, target) in sorted(misplaced_users().items()):
+            problems += 1
+            self.stdout.write(f"user={user_id}: data on {source}, expected on {target}")
+
+        for user in missing_mirrors():
+            problems += 1
+            self.stdout.write(f"user={user.pk}: no user row on its shard")
+
+        if problems:
+            raise CommandError(f"{problems} sharding problems; run rebalance_shards")
+
+        call_command("rebuild_rollups", verify=True, stdout=self.stdout)
+        call_command("verify_savings", stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"All users are on their shards ({len(shard_aliases())} shards)"
+        ))
@@ -0,0 +1,38 @@
+"""
+Scratch SQLite databases for the benchmark and stress commands.
+"""
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def scratch_database(name="scratch.sqlite3", options=None):
+    """
+    Point the default database at a freshly migrated SQLite file in a
+    temporary directory and yield its path; the original settings are
+    restored and the file removed on exit.
+
+    settings_dict is changed in place rather than replaced: connections
+    opened later by other threads or forked workers read the same dict.
+    options, when given, replaces the connection's OPTIONS.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    original = dict(connection.settings_dict)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / name
+        try:
+            connection.close()
+            connection.settings_dict.update(NAME=str(path))
+            if options is not None:
+                connection.settings_dict.update(OPTIONS=dict(options))
+            call_command("migrate", verbosity=0)
+            yield path
+        finally:
+            connections.close_all()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
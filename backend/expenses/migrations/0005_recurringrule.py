@@ -0,0 +1,86 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from calendar import monthrange
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def next_due_after(last_date, day_of_month):
+    index = last_date.year * 12 + last_date.month  # month after last_date, 0-based
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(day_of_month, monthrange(year, month)[1]))
+
+
+def expenses_to_rules(apps, schema_editor):
+    """
+    Every distinct recurring expense (same user, category, amount, note and
+    day) becomes one rule; its existing occurrences are linked to it.
+    """
+    Expense = apps.get_model('expenses', 'Expense')
+    RecurringRule = apps.get_model('expenses', 'RecurringRule')
+    db_alias = schema_editor.connection.alias
+
+    recurring = Expense.objects.using(db_alias).filter(is_recurring=True)
+    groups = (
+        recurring
+        .order_by()
+        .values('user_id', 'category', 'amount', 'note', 'recurrence_day')
+        .annotate(last_date=Max('date'))
+    )
+
+    for group in groups:
+        day_of_month = group['recurrence_day'] or 1
+        rule = RecurringRule.objects.using(db_alias).create(
+            user_id=group['user_id'],
+            amount=group['amount'],
+            category=group['category'],
+            note=group['note'],
+            day_of_month=day_of_month,
+            next_due=next_due_after(group['last_date'], day_of_month),
+        )
+        recurring.filter(
+            user_id=group['user_id'],
+            category=group['category'],
+            amount=group['amount'],
+            note=group['note'],
+            recurrence_day=group['recurrence_day'],
+        ).update(rule=rule)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_spendingrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('category', models.CharField(choices=[('food', 'Food'), ('travel', 'Travel'), ('shopping', 'Shopping'), ('rent', 'Rent'), ('other', 'Other')], max_length=20)),
+                ('note', models.TextField(blank=True)),
+                ('day_of_month', models.PositiveSmallIntegerField(help_text='Day of month the expense falls on (clamped to the month length)')),
+                ('interval_months', models.PositiveSmallIntegerField(default=1, help_text='Number of months between occurrences')),
+                ('next_due', models.DateField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['next_due'],
+                'indexes': [models.Index(fields=['user', 'next_due'], name='expenses_re_user_id_e497d7_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='rule',
+            field=models.ForeignKey(blank=True, help_text='Recurring rule this expense was created from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenses', to='expenses.recurringrule'),
+        ),
+        migrations.RunPython(expenses_to_rules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Sum
+
+from expenses.models import income_totals, recompute_savings
+
+
+def recompute_snapshots(apps, schema_editor):
+    """
+    Rewrite every savings snapshot as the running total of income minus
+    spending up to its month, as verify_savings --fix does, so snapshots
+    left stale before SavingsSnapshotManager.apply kept the whole chain in
+    step are corrected.
+    """
+    MonthlyIncome = apps.get_model('expenses', 'MonthlyIncome')
+    SpendingRollup = apps.get_model('expenses', 'SpendingRollup')
+    SavingsSnapshot = apps.get_model('expenses', 'SavingsSnapshot')
+    db_alias = schema_editor.connection.alias
+
+    spending = (
+        SpendingRollup.objects.using(db_alias)
+        .order_by()
+        .values('user_id', 'month')
+        .annotate(total=Sum('total'))
+    )
+    spending = {(row['user_id'], row['month']): row['total'] for row in spending}
+
+    drifted = []
+    for snapshot, expected in recompute_savings(
+        SavingsSnapshot.objects.using(db_alias).order_by('user_id', 'month'),
+        income_totals(MonthlyIncome.objects.using(db_alias)),
+        spending,
+    ):
+        if expected != snapshot.savings_balance:
+            snapshot.savings_balance = expected
+            drifted.append(snapshot)
+
+    SavingsSnapshot.objects.using(db_alias).bulk_update(drifted, ['savings_balance'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_budget_expense_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:55
+
+import expenses.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0007_recompute_savings_snapshots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='budget',
+            name='month',
+            field=models.DateField(default=expenses.models.first_of_this_month, help_text='First day of the month this budget applies to'),
+        ),
+    ]
@@ -1,7 +1,183 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
 from django.contrib.auth.models import User
+from django.utils import timezone
+from calendar import monthrange
 from datetime import date
 
+from .caching import bump_versions_on_commit
+
+
+# Fields whose change moves an expense between SpendingRollup buckets
+ROLLUP_FIELDS = {"user", "user_id", "amount", "category", "date"}
+
+
+def add_months(month_start, months):
+    """
+    Shift a first-of-month date by a number of months.
+    """
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def first_of_this_month():
+    """
+    Today's month as a first-of-month date; a callable, so field defaults
+    follow the calendar instead of the day the module was imported.
+    """
+    return date.today().replace(day=1)
+
+
+def add_rollup_delta(deltas, user_id, day, category, total, count):
+    """
+    Accumulate a (total, count) change for the bucket `day` falls into.
+    """
+    key = (user_id, day.replace(day=1), category)
+    old_total, old_count = deltas.get(key, (0, 0))
+    deltas[key] = (old_total + total, old_count + count)
+
+
+def diff_rollup_totals(before, after):
+    """
+    Turn two {bucket: (total, count)} maps into the delta between them.
+    """
+    deltas = {}
+    for key, (total, count) in after.items():
+        add_rollup_delta(deltas, key[0], key[1], key[2], total, count)
+    for key, (total, count) in before.items():
+        add_rollup_delta(deltas, key[0], key[1], key[2], -total, -count)
+    return deltas
+
+
+def expense_deltas(expenses, deltas=None):
+    """
+    Rollup deltas for adding `expenses`, accumulated into `deltas` if given.
+    """
+    deltas = {} if deltas is None else deltas
+    for expense in expenses:
+        values = expense._rollup_values()
+        add_rollup_delta(
+            deltas, values["user_id"], values["date"],
+            values["category"], values["amount"], 1
+        )
+    return deltas
+
+
+def apply_expense_deltas(using, deltas):
+    """
+    Push expense bucket deltas into SpendingRollup and the savings snapshots.
+    """
+    SpendingRollup.objects.db_manager(using).apply(deltas)
+
+    balance_deltas = {}
+    for (user_id, month, _), (total, _) in deltas.items():
+        key = (user_id, month)
+        balance_deltas[key] = balance_deltas.get(key, 0) - total
+    SavingsSnapshot.objects.db_manager(using).apply(balance_deltas)
+
+    bump_versions_on_commit(using, balance_deltas)
+
+
+def apply_income_deltas(using, deltas):
+    """
+    Push {(user_id, month): amount} income deltas into the savings snapshots.
+    """
+    SavingsSnapshot.objects.db_manager(using).apply(deltas)
+    bump_versions_on_commit(using, deltas)
+
+
+def income_totals(queryset):
+    """
+    {(user_id, month): amount} for a MonthlyIncome queryset.
+    """
+    return {
+        (row["user_id"], row["month"]): row["total"]
+        for row in queryset.order_by().values("user_id", "month").annotate(total=Sum("amount"))
+    }
+
+
+def diff_income_totals(before, after):
+    deltas = dict(after)
+    for key, amount in before.items():
+        deltas[key] = deltas.get(key, 0) - amount
+    return deltas
+
+
+def recompute_savings(snapshots, incomes, spending):
+    """
+    Yield (snapshot, balance) with the balance each snapshot should hold:
+    income minus spending for every month up to and including its own.
+
+    incomes and spending are {(user_id, month): total}; snapshots must be
+    ordered by (user_id, month). Each user's months are summed once, in
+    order, however many snapshots they have. Only plain rows are read, so
+    migrations can pass their historical models.
+    """
+    # Net flow per (user, month): income minus spending
+    flows = diff_income_totals(spending, incomes)
+
+    months_by_user = {}
+    for user_id, month in sorted(flows):
+        months_by_user.setdefault(user_id, []).append(month)
+
+    user_id = None
+    for snapshot in snapshots:
+        if snapshot.user_id != user_id:
+            user_id = snapshot.user_id
+            months = iter(months_by_user.get(user_id, ()))
+            month = next(months, None)
+            balance = 0
+        while month is not None and month <= snapshot.month:
+            balance += flows[(user_id, month)]
+            month = next(months, None)
+        yield snapshot, balance
+
+
+class MonthlyIncomeQuerySet(models.QuerySet):
+    """
+    Keeps the savings snapshots in step with bulk income writes.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+
+            deltas = {}
+            for obj in created:
+                amount = obj._meta.get_field("amount").to_python(obj.amount)
+                key = (obj.user_id, obj.month)
+                deltas[key] = deltas.get(key, 0) + amount
+            apply_income_deltas(self.db, deltas)
+
+        return created
+
+    def update(self, **kwargs):
+        if {"user", "user_id", "month", "amount"}.isdisjoint(kwargs):
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            affected = self.model.objects.using(self.db).filter(pk__in=pks)
+            before = income_totals(affected)
+            updated = super().update(**kwargs)
+            apply_income_deltas(self.db, diff_income_totals(before, income_totals(affected)))
+
+        return updated
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            before = income_totals(self)
+            result = super().delete()
+            apply_income_deltas(self.db, diff_income_totals(before, {}))
+
+        return result
+
+    delete.alters_data = True
+
 
 class MonthlyIncome(models.Model):
     """
@@ -12,6 +188,8 @@ class MonthlyIncome(models.Model):
     month = models.DateField(help_text="Use the first day of the month")
     amount = models.DecimalField(max_digits=10, decimal_places=2)
 
+    objects = MonthlyIncomeQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'month')
         ordering = ['-month']
@@ -19,6 +197,100 @@ class MonthlyIncome(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.month} - {self.amount}"
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            before = {}
+            if self.pk is not None and not self._state.adding:
+                before = income_totals(type(self).objects.using(using).filter(pk=self.pk))
+
+            super().save(*args, **kwargs)
+
+            after = income_totals(type(self).objects.using(using).filter(pk=self.pk))
+            apply_income_deltas(using, diff_income_totals(before, after))
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            before = income_totals(type(self).objects.using(using).filter(pk=self.pk))
+            result = super().delete(*args, **kwargs)
+            apply_income_deltas(using, diff_income_totals(before, {}))
+
+        return result
+
+
+class ExpenseQuerySet(models.QuerySet):
+    """
+    Keeps SpendingRollup in step with the bulk paths that skip Expense.save().
+    """
+
+    def rollup_totals(self):
+        """
+        Aggregate this queryset into {(user_id, month, category): (total, count)}.
+        """
+        rows = (
+            self.order_by()
+            .annotate(month=TruncMonth("date"))
+            .values("user_id", "month", "category")
+            .annotate(total=Sum("amount"), count=Count("id"))
+        )
+        return {
+            (row["user_id"], row["month"], row["category"]): (row["total"], row["count"])
+            for row in rows
+        }
+
+    def _rollup_totals_for(self, pks, batch_size=500):
+        totals = {}
+        for i in range(0, len(pks), batch_size):
+            batch = self.model.objects.using(self.db).filter(pk__in=pks[i:i + batch_size])
+            for key, (total, count) in batch.rollup_totals().items():
+                old_total, old_count = totals.get(key, (0, 0))
+                totals[key] = (old_total + total, old_count + count)
+        return totals
+
+    def bulk_create(self, objs, *args, maintain_rollups=True, **kwargs):
+        """
+        With maintain_rollups=False the caller takes over: it must pass
+        expense_deltas(...) of the created rows to apply_expense_deltas()
+        in the same transaction. Lets chunked imports update the rollups
+        once instead of once per chunk.
+        """
+        if not maintain_rollups:
+            return super().bulk_create(objs, *args, **kwargs)
+
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            apply_expense_deltas(self.db, expense_deltas(created))
+
+        return created
+
+    def update(self, **kwargs):
+        # bulk_update() funnels through here as well
+        if ROLLUP_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            before = self._rollup_totals_for(pks)
+            updated = super().update(**kwargs)
+            after = self._rollup_totals_for(pks)
+            apply_expense_deltas(self.db, diff_rollup_totals(before, after))
+
+        return updated
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            before = self.rollup_totals()
+            result = super().delete()
+            apply_expense_deltas(self.db, diff_rollup_totals(before, {}))
+
+        return result
+
+    delete.alters_data = True
+
 
 class Expense(models.Model):
     """
@@ -45,15 +317,236 @@ class Expense(models.Model):
         null=True, blank=True,
         help_text="Day of month for recurring expense (1–28 recommended)"
     )
+    rule = models.ForeignKey(
+        "RecurringRule",
+        null=True, blank=True,
+        on_delete=models.SET_NULL,
+        related_name="expenses",
+        help_text="Recurring rule this expense was created from"
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ExpenseQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Month ranges, history and keyset pages: user + date range
+            models.Index(fields=["user", "date"]),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.category} - {self.amount}"
 
+    def _rollup_values(self):
+        return {
+            "user_id": self.user_id,
+            "date": self._meta.get_field("date").to_python(self.date),
+            "category": self.category,
+            "amount": self._meta.get_field("amount").to_python(self.amount),
+        }
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ROLLUP_FIELDS.isdisjoint(update_fields):
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            previous = None
+            if self.pk is not None and not self._state.adding:
+                previous = (
+                    type(self).objects.using(using)
+                    .filter(pk=self.pk)
+                    .values("user_id", "date", "category", "amount")
+                    .first()
+                )
+
+            super().save(*args, **kwargs)
+
+            current = self._rollup_values()
+            if previous and update_fields is not None:
+                # Only the listed fields were written; the rest keep their stored value
+                saved = {"user_id" if f == "user" else f for f in update_fields}
+                current = {
+                    name: value if name in saved else previous[name]
+                    for name, value in current.items()
+                }
+
+            deltas = {}
+            add_rollup_delta(
+                deltas, current["user_id"], current["date"],
+                current["category"], current["amount"], 1
+            )
+            if previous:
+                add_rollup_delta(
+                    deltas, previous["user_id"], previous["date"],
+                    previous["category"], -previous["amount"], -1
+                )
+            apply_expense_deltas(using, deltas)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            previous = (
+                type(self).objects.using(using)
+                .filter(pk=self.pk)
+                .values("user_id", "date", "category", "amount")
+                .first()
+            )
+            result = super().delete(*args, **kwargs)
+
+            if previous:
+                deltas = {}
+                add_rollup_delta(
+                    deltas, previous["user_id"], previous["date"],
+                    previous["category"], -previous["amount"], -1
+                )
+                apply_expense_deltas(using, deltas)
+
+        return result
+
+
+class RecurringRule(models.Model):
+    """
+    A recurring expense. Every occurrence that falls due becomes an Expense
+    pointing back at the rule, and next_due moves on to the following one.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.CharField(max_length=20, choices=Expense.CATEGORY_CHOICES)
+    note = models.TextField(blank=True)
+
+    day_of_month = models.PositiveSmallIntegerField(
+        help_text="Day of month the expense falls on (clamped to the month length)"
+    )
+    interval_months = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="Number of months between occurrences"
+    )
+    next_due = models.DateField()
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["next_due"]
+        indexes = [
+            models.Index(fields=["user", "next_due"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.category} - {self.amount} - next {self.next_due}"
+
+    def due_date(self, month_start):
+        """
+        Date this rule falls on within the month starting at `month_start`.
+        """
+        last_day = monthrange(month_start.year, month_start.month)[1]
+        return month_start.replace(day=min(self.day_of_month, last_day))
+
+    def advance(self):
+        """
+        Move next_due on to the following occurrence.
+        """
+        self.next_due = self.due_date(
+            add_months(self.next_due.replace(day=1), self.interval_months)
+        )
+
+    def build_expense(self):
+        """
+        Unsaved Expense for the occurrence on next_due.
+        """
+        return Expense(
+            user_id=self.user_id,
+            amount=self.amount,
+            category=self.category,
+            date=self.next_due,
+            note=self.note,
+            is_recurring=True,
+            recurrence_day=self.day_of_month,
+            rule=self
+        )
+
+
+class BudgetQuerySet(models.QuerySet):
+    """
+    Invalidates cached responses for the months bulk budget writes touch.
+    """
+
+    def _months(self):
+        return set(self.order_by().values_list("user_id", "month").distinct())
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        month_field = self.model._meta.get_field("month")
+        bump_versions_on_commit(
+            self.db, {(obj.user_id, month_field.to_python(obj.month)) for obj in created}
+        )
+        return created
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            affected = self.model.objects.using(self.db).filter(pk__in=pks)
+            months = affected._months()
+            updated = super().update(**kwargs)
+            bump_versions_on_commit(self.db, months | affected._months())
+        return updated
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            months = self._months()
+            result = super().delete()
+            bump_versions_on_commit(self.db, months)
+        return result
+
+    delete.alters_data = True
+
+    def copy_month(self, source, target, user_ids=None):
+        """
+        Clone the budgets of month `source` into month `target` with one
+        INSERT ... SELECT. Categories that already have a budget in the
+        target month are left alone. Returns the number of rows inserted.
+        """
+        ops = connections[self.db].ops
+        table = ops.quote_name(self.model._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} (user_id, category, amount, month, created_at) "
+            f"SELECT user_id, category, amount, %s, %s FROM {table} WHERE month = %s"
+        )
+        params = [
+            ops.adapt_datefield_value(target),
+            ops.adapt_datetimefield_value(timezone.now()),
+            ops.adapt_datefield_value(source),
+        ]
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return 0
+            sql += f" AND user_id IN ({', '.join(['%s'] * len(user_ids))})"
+            params += user_ids
+        sql += " ON CONFLICT (user_id, category, month) DO NOTHING"
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(sql, params)
+                inserted = cursor.rowcount
+            if inserted:
+                users = self.model.objects.using(self.db).filter(month=target)
+                if user_ids is not None:
+                    users = users.filter(user_id__in=user_ids)
+                bump_versions_on_commit(
+                    self.db,
+                    {(user_id, target) for user_id in users.values_list("user_id", flat=True).distinct()}
+                )
+        return inserted
+
+    copy_month.alters_data = True
+
 
 class Budget(models.Model):
     CATEGORY_CHOICES = [
@@ -70,25 +563,135 @@ class Budget(models.Model):
 
     # ✅ Monthly budget
     month = models.DateField(
-        default=date.today().replace(day=1),
+        default=first_of_this_month,
         help_text="First day of the month this budget applies to"
     )
 
     # ✅ Safe for existing rows
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BudgetQuerySet.as_manager()
+
     class Meta:
         unique_together = ("user", "category", "month")
+        indexes = [
+            # The unique index is (user_id, category, month): category sits
+            # between user and month, so it can't serve (user, month) lookups.
+            models.Index(fields=["user", "month"]),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.category} - {self.month}"
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        months = {(self.user_id, self._meta.get_field("month").to_python(self.month))}
+        if self.pk is not None and not self._state.adding:
+            months |= type(self).objects.using(using).filter(pk=self.pk)._months()
+
+        super().save(*args, **kwargs)
+        bump_versions_on_commit(using, months)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        result = super().delete(*args, **kwargs)
+        bump_versions_on_commit(
+            using, {(self.user_id, self._meta.get_field("month").to_python(self.month))}
+        )
+        return result
+
 
 
 # Savings tracking model
+class SavingsSnapshotManager(models.Manager):
+
+    def flows(self, user_id, after, upto):
+        """
+        Income minus spending for the months in (after, upto].
+        `after=None` starts from the beginning of the user's history.
+        """
+        incomes = MonthlyIncome.objects.using(self.db).filter(user_id=user_id, month__lte=upto)
+        spending = SpendingRollup.objects.using(self.db).filter(user_id=user_id, month__lte=upto)
+
+        if after is not None:
+            incomes = incomes.filter(month__gt=after)
+            spending = spending.filter(month__gt=after)
+
+        income = incomes.aggregate(total=Sum("amount"))["total"] or 0
+        spent = spending.aggregate(total=Sum("total"))["total"] or 0
+
+        return income - spent
+
+    def balance_at(self, user_id, month, reuse_snapshot=True):
+        """
+        Savings balance at the end of `month`, computed without writing.
+
+        Starts from the latest snapshot (at or before `month`, or strictly
+        before it with reuse_snapshot=False) and adds the flows since.
+        """
+        snapshots = self.filter(user_id=user_id)
+        snapshots = snapshots.filter(month__lte=month) if reuse_snapshot else snapshots.filter(month__lt=month)
+        snapshot = snapshots.order_by("-month").first()
+
+        if snapshot is None:
+            return self.flows(user_id, None, month)
+        if snapshot.month == month:
+            return snapshot.savings_balance
+
+        return snapshot.savings_balance + self.flows(user_id, snapshot.month, month)
+
+    def apply(self, deltas):
+        """
+        Push {(user_id, month): balance_delta} changes into the snapshots.
+
+        Each existing snapshot gets the deltas of its own and earlier months
+        in one UPDATE per user, so an edit to an old month never leaves the
+        rest of the chain stale. Written months without a snapshot get one
+        afterwards, computed from the updated chain.
+        """
+        changes = {}
+        for (user_id, month), delta in sorted(deltas.items()):
+            if delta:
+                changes.setdefault(user_id, []).append((month, delta))
+        if not changes:
+            return
+
+        existing = set(
+            self.filter(
+                user_id__in=changes,
+                month__in={month for months in changes.values() for month, _ in months},
+            ).values_list("user_id", "month")
+        )
+
+        for user_id, months in changes.items():
+            whens = []
+            running = 0
+            for month, delta in months:
+                running += delta
+                whens.append(When(month__gte=month, then=Value(running)))
+
+            # Latest month first, so each snapshot matches the running total up to it
+            self.filter(user_id=user_id, month__gte=months[0][0]).update(
+                savings_balance=F("savings_balance") + Case(
+                    *reversed(whens),
+                    output_field=SavingsSnapshot._meta.get_field("savings_balance"),
+                )
+            )
+
+        for user_id, months in changes.items():
+            for month, _ in months:
+                if (user_id, month) not in existing:
+                    self.create(
+                        user_id=user_id,
+                        month=month,
+                        savings_balance=self.balance_at(user_id, month, reuse_snapshot=False)
+                    )
+
+
 class SavingsSnapshot(models.Model):
     """
     Tracks monthly savings balance for users.
+    Written when the income or expenses behind it change, never on read.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     month = models.DateField()  # first day of month
@@ -96,9 +699,102 @@ class SavingsSnapshot(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SavingsSnapshotManager()
+
     class Meta:
         unique_together = ("user", "month")
         ordering = ["month"]
 
     def __str__(self):
         return f"{self.user} - {self.month} - {self.savings_balance}"
+
+
+
+# Spending rollup model
+class SpendingRollupManager(models.Manager):
+
+    # Buckets per upsert statement (5 parameters each)
+    UPSERT_BATCH_SIZE = 150
+
+    def apply(self, deltas):
+        """
+        Add {(user_id, month, category): (total, count)} deltas to the rollup.
+
+        Each batch of buckets is a single INSERT ... ON CONFLICT DO UPDATE
+        that increments existing rows in place, so there is no read first,
+        no lost update between concurrent writers, and the number of
+        statements doesn't depend on how many buckets exist. Buckets left
+        empty are removed afterwards.
+        """
+        deltas = {key: value for key, value in deltas.items() if value != (0, 0)}
+        if not deltas:
+            return
+
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        total_field = self.model._meta.get_field("total")
+
+        rows = [
+            (
+                user_id,
+                connection.ops.adapt_datefield_value(month),
+                category,
+                connection.ops.adapt_decimalfield_value(
+                    total, total_field.max_digits, total_field.decimal_places
+                ),
+                count,
+            )
+            for (user_id, month, category), (total, count) in deltas.items()
+        ]
+
+        sql = (
+            "INSERT INTO {table} ({user_id}, {month}, {category}, {total}, {count}) "
+            "VALUES {values} "
+            "ON CONFLICT ({user_id}, {month}, {category}) DO UPDATE SET "
+            "{total} = {table}.{total} + excluded.{total}, "
+            "{count} = {table}.{count} + excluded.{count}"
+        )
+
+        with connection.cursor() as cursor:
+            for i in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+                batch = rows[i:i + self.UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    sql.format(
+                        table=table,
+                        user_id=quote("user_id"),
+                        month=quote("month"),
+                        category=quote("category"),
+                        total=quote("total"),
+                        count=quote("expense_count"),
+                        values=", ".join(["(%s, %s, %s, %s, %s)"] * len(batch)),
+                    ),
+                    [value for row in batch for value in row]
+                )
+
+        if any(count < 0 for _, count in deltas.values()):
+            self.filter(
+                user_id__in={key[0] for key in deltas},
+                expense_count__lte=0
+            ).delete()
+
+
+class SpendingRollup(models.Model):
+    """
+    Total spent and number of expenses per user, month and category.
+    Kept up to date by Expense writes so reads never re-aggregate raw rows.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # first day of month
+    category = models.CharField(max_length=20, choices=Expense.CATEGORY_CHOICES)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+
+    objects = SpendingRollupManager()
+
+    class Meta:
+        unique_together = ("user", "month", "category")
+        ordering = ["month", "category"]
+
+    def __str__(self):
+        return f"{self.user} - {self.month} - {self.category} - {self.total}"
@@ -0,0 +1,74 @@
+"""
+Keyset (cursor) pagination for expense lists.
+
+Pages are ordered by (-date, -id), the model's default ordering with id
+as a tie-breaker, and each page starts strictly after the last row of
+the previous one. Deep pages cost the same as the first: there is no
+OFFSET to skip over.
+"""
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Query parameters that turn a list request into a keyset page
+PAGE_PARAMS = ("from", "to", "limit", "cursor")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(day, pk):
+    payload = json.dumps([day.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return date.fromisoformat(day), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def parse_limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, MAX_LIMIT)
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Return (rows, next_cursor) for the page after `cursor`.
+    next_cursor is None on the last page. Works on model and .values()
+    querysets alike.
+    """
+    queryset = queryset.order_by("-date", "-id")
+
+    if cursor:
+        day, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last["date"], last["id"])
+    return rows, encode_cursor(last.date, last.pk)
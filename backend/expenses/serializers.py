@@ -1,6 +1,14 @@
-from rest_framework import serializers
+import decimal
+from datetime import date
+from functools import cached_property
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from .models import Expense, MonthlyIncome, Budget
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
 
 class MonthlyIncomeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,8 +31,10 @@ class ExpenseSerializer(serializers.ModelSerializer):
             'note',
             'is_recurring',
             'recurrence_day',
+            'rule',
             'created_at',
         ]
+        read_only_fields = ['rule']
 
 
 class BudgetSerializer(serializers.ModelSerializer):
@@ -49,3 +59,118 @@ class RegisterSerializer(serializers.ModelSerializer):
             password=validated_data["password"]
         )
         return user
+
+
+# Fields whose representation is the database value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def compile_field(field, tz):
+    """
+    A fast to_representation for `field`, or None when the value passes
+    through unchanged. `tz` is the current time zone (None without
+    USE_TZ). Falls back to the field's own method.
+    """
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+
+    if isinstance(field, serializers.DecimalField):
+        coerce = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        if coerce and not field.localize and not field.normalize_output and field.decimal_places is not None:
+            quantum = decimal.Decimal(".1") ** field.decimal_places
+            context = decimal.getcontext().copy()
+            if field.max_digits is not None:
+                context.prec = field.max_digits
+            rounding = field.rounding
+
+            def decimal_to_string(value):
+                return f"{value.quantize(quantum, rounding=rounding, context=context):f}"
+
+            return decimal_to_string
+
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if is_iso_8601(output_format) and tz is not None and not hasattr(field, "timezone"):
+
+            def datetime_to_string(value):
+                if value.tzinfo is None:
+                    return field.to_representation(value)
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+            return datetime_to_string
+
+    if isinstance(field, serializers.DateField):
+        if is_iso_8601(getattr(field, "format", api_settings.DATE_FORMAT)):
+            return date.isoformat
+
+    return field.to_representation
+
+
+def is_iso_8601(output_format):
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path for lists: reads `.values()` rows and formats them
+    as `serializer_class` would, with converters compiled once per list
+    instead of a model instance and a field walk per row.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def fields(self):
+        fields = {}
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source != name:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} has a source; ValuesSerializer needs plain fields"
+                )
+            fields[name] = field
+        return fields
+
+    def values(self, queryset):
+        return queryset.values(*self.fields)
+
+    def to_representation(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = [
+            (name, convert)
+            for name, field in self.fields.items()
+            if (convert := compile_field(field, tz)) is not None
+        ]
+
+        data = []
+        for row in rows:
+            for name, convert in converters:
+                value = row[name]
+                if value is not None:
+                    row[name] = convert(value)
+            data.append(row)
+        return data
+
+    def data(self, queryset):
+        return self.to_representation(self.values(queryset))
+
+    def from_instances(self, objs):
+        """
+        Same output for model instances already loaded for something else.
+        """
+        return self.to_representation(
+            [{name: getattr(obj, name) for name in self.fields} for obj in objs]
+        )
+
+
+expense_values = ValuesSerializer(ExpenseSerializer)
+budget_values = ValuesSerializer(BudgetSerializer)
@@ -1,43 +1,492 @@
+from dataclasses import dataclass, field
 from datetime import date
-from django.db.models import Sum
-from .models import MonthlyIncome, Expense, SavingsSnapshot
+from decimal import Decimal
+from django.db import router, transaction
+from django.db.models import Min, Q, Sum
+from .models import (
+    Budget,
+    MonthlyIncome,
+    Expense,
+    RecurringRule,
+    SavingsSnapshot,
+    SpendingRollup,
+    add_months,
+)
+from .serializers import ExpenseSerializer
 
-def calculate_savings(user, year, month):
-    current_month = date(year, month, 1)
 
-    prev_month = month - 1 or 12
-    prev_year = year - 1 if month == 1 else year
-    prev_date = date(prev_year, prev_month, 1)
+CENTS = Decimal("0.01")
 
-    prev_snapshot = SavingsSnapshot.objects.filter(
-        user=user,
-        month=prev_date
-    ).first()
 
-    prev_savings = prev_snapshot.savings_balance if prev_snapshot else 0
+@dataclass
+class MonthData:
+    """
+    Everything the month-level read views need, fetched up front.
+    """
+    month: date
+    previous_month: date
+    income: object = 0
+    budgets: list = field(default_factory=list)
+    spent_by_category: dict = field(default_factory=dict)
+    previous_spent_by_category: dict = field(default_factory=dict)
+
+    @property
+    def total_spent(self):
+        return sum(self.spent_by_category.values())
+
+    @property
+    def previous_total_spent(self):
+        return sum(self.previous_spent_by_category.values())
+
+    @property
+    def total_budget(self):
+        return sum(budget.amount for budget in self.budgets)
+
 
-    income = MonthlyIncome.objects.filter(
+def month_expenses(user, month_start):
+    return Expense.objects.filter(
         user=user,
-        month=current_month
-    ).aggregate(total=Sum("amount"))["total"] or 0
+        date__gte=month_start,
+        date__lt=add_months(month_start, 1)
+    )
+
 
-    expenses = Expense.objects.filter(
+def month_budgets(user, month_start):
+    return Budget.objects.filter(
         user=user,
-        date__year=year,
-        date__month=month
-    ).aggregate(total=Sum("amount"))["total"] or 0
+        month=month_start
+    )
+
+
+def upsert_month_budgets(user, month_start, budgets):
+    """
+    Insert or update a month's budgets ([{category, amount}, ...]) with a
+    single INSERT ... ON CONFLICT. Categories not listed are left alone.
+    """
+    Budget.objects.bulk_create(
+        [
+            Budget(user=user, month=month_start, category=b["category"], amount=b["amount"])
+            for b in budgets
+        ],
+        update_conflicts=True,
+        unique_fields=["user", "category", "month"],
+        update_fields=["amount"],
+    )
+    return month_budgets(user, month_start)
 
-    return prev_savings + income - expenses
 
-def update_savings_snapshot(user, year, month):
+def copy_month_budgets(user, source, target):
+    """
+    Clone `source` month's budgets into `target`, keeping any budget
+    already set there. Returns the number of budgets copied.
+    """
+    return Budget.objects.copy_month(source, target, user_ids=[user.pk])
+
+
+def rollforward_budgets(target):
+    """
+    Copy every user's budgets from the month before `target` into it.
+    """
+    return Budget.objects.copy_month(add_months(target, -1), target)
+
+
+def load_month_data(user, year, month):
+    """
+    Load a MonthData in three queries: one conditional aggregation over
+    the rollups for this and the previous month, the budgets and the income.
+    """
     month_start = date(year, month, 1)
+    previous_start = add_months(month_start, -1)
 
-    savings = calculate_savings(user, year, month)
+    data = MonthData(month=month_start, previous_month=previous_start)
 
-    snapshot, _ = SavingsSnapshot.objects.update_or_create(
-        user=user,
-        month=month_start,
-        defaults={"savings_balance": savings}
+    spending = (
+        SpendingRollup.objects.filter(
+            user=user,
+            month__in=[previous_start, month_start]
+        )
+        .order_by()
+        .values("category")
+        .annotate(
+            current=Sum("total", filter=Q(month=month_start)),
+            previous=Sum("total", filter=Q(month=previous_start))
+        )
+    )
+    # SQLite hands back unscaled sums; keep the model's two decimal places
+    for row in spending:
+        if row["current"] is not None:
+            data.spent_by_category[row["category"]] = row["current"].quantize(CENTS)
+        if row["previous"] is not None:
+            data.previous_spent_by_category[row["category"]] = row["previous"].quantize(CENTS)
+
+    data.budgets = list(month_budgets(user, month_start))
+
+    income_obj = MonthlyIncome.objects.filter(user=user, month=month_start).first()
+    data.income = income_obj.amount if income_obj else 0
+
+    return data
+
+
+def dashboard_summary(data, savings_balance):
+    """
+    Dashboard payload for a pre-fetched MonthData.
+    """
+    income = data.income
+    category_breakdown = data.spent_by_category
+    total_spent = data.total_spent
+
+    # -------- Monthly Balance & Savings --------
+    monthly_balance = income - total_spent
+
+    category_budgets = {}
+    total_budget = 0
+
+    for budget in data.budgets:
+        spent = category_breakdown.get(budget.category, 0)
+        total_budget += budget.amount
+
+        percentage = (
+            round((spent / budget.amount) * 100, 2)
+            if budget.amount > 0
+            else 0
+        )
+
+        category_budgets[budget.category] = {
+            "budget": budget.amount,
+            "spent": spent,
+            "percentage": percentage
+        }
+
+    # -------- Budget Summary --------
+    budget_summary = {
+        "total_budget": total_budget,
+        "income": income,
+        "difference": income - total_budget,
+        "is_over_budgeted": total_budget > income
+    }
+
+    return {
+        "income": income,
+        "total_spent": total_spent,
+
+        "monthly_balance": monthly_balance,
+        "savings_balance": savings_balance,
+
+        "category_breakdown": category_breakdown,
+        "category_budgets": category_budgets,
+        "budget_summary": budget_summary
+    }
+
+
+def calculate_savings(user, year, month):
+    """
+    Savings balance at the end of the month. Read-only.
+    """
+    return SavingsSnapshot.objects.balance_at(user.id, date(year, month, 1))
+
+
+# Longest range savings_history will build (ten years)
+MAX_HISTORY_MONTHS = 120
+
+
+def months_between(start, end):
+    """
+    Number of months from `start` to `end`, both included.
+    """
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def savings_history(user, start, end):
+    """
+    Income, spending and running savings balance for every month from
+    `start` to `end` (first-of-month dates, inclusive).
+
+    Two grouped queries cover the user's whole history up to `end`; the
+    running total is built in Python, so months without a snapshot or
+    without any activity come out right as well.
+    """
+    income_by_month = dict(
+        MonthlyIncome.objects.filter(user=user, month__lte=end)
+        .order_by()
+        .values("month")
+        .annotate(total=Sum("amount"))
+        .values_list("month", "total")
     )
+    spent_by_month = dict(
+        SpendingRollup.objects.filter(user=user, month__lte=end)
+        .order_by()
+        .values("month")
+        .annotate(spent=Sum("total"))
+        .values_list("month", "spent")
+    )
+
+    # Everything before `start` only contributes to the opening balance
+    balance = sum(
+        amount for month, amount in income_by_month.items() if month < start
+    ) - sum(
+        amount for month, amount in spent_by_month.items() if month < start
+    )
+
+    history = []
+    for offset in range(months_between(start, end)):
+        # Never steps past `end`, so December 9999 doesn't overflow
+        month = add_months(start, offset)
+        income = income_by_month.get(month, 0)
+        spent = spent_by_month.get(month, 0)
+        balance += income - spent
+
+        history.append({
+            "month": f"{month:%Y-%m}",
+            "income": income,
+            "spent": spent,
+            "monthly_balance": income - spent,
+            "savings_balance": balance
+        })
+
+    return history
+
+
+def create_recurring_rule(expense):
+    """
+    Turn a newly created recurring expense into a RecurringRule.
+    The expense itself counts as the rule's first occurrence.
+    """
+    return create_recurring_rules([expense])[0]
+
+
+def create_recurring_rules(expenses):
+    """
+    create_recurring_rule() for many expenses at once: one bulk insert of
+    the rules and one bulk update linking each expense to its rule.
+    """
+    if not expenses:
+        return []
+
+    rules = []
+    for expense in expenses:
+        rule = RecurringRule(
+            user_id=expense.user_id,
+            amount=expense.amount,
+            category=expense.category,
+            note=expense.note,
+            day_of_month=expense.recurrence_day or 1,
+            next_due=expense.date
+        )
+        rule.next_due = rule.due_date(add_months(expense.date.replace(day=1), 1))
+        rules.append(rule)
+
+    rules = RecurringRule.objects.bulk_create(rules)
+    for expense, rule in zip(expenses, rules):
+        expense.rule = rule
+    Expense.objects.bulk_update(expenses, ["rule"])
+
+    return rules
+
+
+def stop_recurring_rules(expenses):
+    """
+    Deactivate the rules that any of `expenses` originated (the rule's
+    first expense). Call before the expenses are deleted or un-flagged.
+    """
+    rule_ids = {expense.rule_id for expense in expenses if expense.rule_id}
+    if not rule_ids:
+        return
+
+    ids = {expense.pk for expense in expenses}
+    origins = (
+        Expense.objects.filter(rule_id__in=rule_ids)
+        .order_by()
+        .values("rule_id")
+        .annotate(first=Min("id"))
+    )
+    stopped = [row["rule_id"] for row in origins if row["first"] in ids]
+    RecurringRule.objects.filter(pk__in=stopped).update(is_active=False)
+
+
+def sync_recurring_rule(expense, was_recurring, today=None):
+    """
+    Follow an edit of `expense`'s is_recurring flag: switching it on
+    starts a rule (or resumes a stopped one from the next occurrence),
+    switching it off on the originating expense stops the rule.
+    """
+    sync_recurring_rules([(expense, was_recurring)], today)
+
+
+def sync_recurring_rules(changes, today=None):
+    """
+    sync_recurring_rule() for many (expense, was_recurring) pairs, with a
+    fixed number of queries whatever their number.
+    """
+    stopping = []
+    starting = []
+    resuming = {}
+    for expense, was_recurring in changes:
+        if expense.is_recurring == was_recurring:
+            continue
+        if not expense.is_recurring:
+            stopping.append(expense)
+        elif expense.rule_id is None:
+            starting.append(expense)
+        else:
+            resuming[expense.rule_id] = expense
+
+    stop_recurring_rules(stopping)
+    create_recurring_rules(starting)
+    if not resuming:
+        return
+
+    today = today or date.today()
+    rules = list(RecurringRule.objects.filter(pk__in=resuming, is_active=False))
+    for rule in rules:
+        # Months missed while the rule was stopped are not backfilled
+        while rule.next_due < today:
+            rule.advance()
+        rule.is_active = True
+        resuming[rule.pk].rule = rule
+    RecurringRule.objects.bulk_update(rules, ["is_active", "next_due"])
+
+
+def generate_due_expenses(rules, today):
+    """
+    Create every occurrence of `rules` due on or before `today` and move
+    each rule's next_due past it.
+
+    Two writes whatever the number of rules or missed months: one bulk
+    insert of expenses and one bulk update of next_due.
+    """
+    expenses = []
+    advanced = []
+
+    for rule in rules:
+        if rule.next_due > today:
+            continue
+
+        while rule.next_due <= today:
+            expenses.append(rule.build_expense())
+            rule.advance()
+        advanced.append(rule)
+
+    with transaction.atomic(using=router.db_for_write(Expense)):
+        Expense.objects.bulk_create(expenses)
+        RecurringRule.objects.bulk_update(advanced, ["next_due"])
+
+    return len(expenses)
+
+
+def generate_recurring_expenses(user, today=None):
+    """
+    Create the recurring expenses the user has due up to `today`,
+    catching up on any months missed since the last run.
+    """
+    today = today or date.today()
+
+    with transaction.atomic(using=router.db_for_write(RecurringRule)):
+        rules = RecurringRule.objects.select_for_update().filter(
+            user=user,
+            is_active=True,
+            next_due__lte=today
+        )
+        return generate_due_expenses(list(rules), today)
+
+
+BATCH_OPERATIONS = ("create", "update", "delete")
+MAX_BATCH_OPERATIONS = 500
+
+
+def is_plain_int(value):
+    # bool is an int subclass; JSON true is not an id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def apply_expense_batch(user, operations):
+    """
+    Validate and apply a list of create/update/delete operations in one
+    transaction. Returns (ok, results) with one result per operation;
+    when any operation is invalid nothing is applied.
+
+    Ownership of every referenced id is checked with a single query and
+    the writes are one bulk_create, one bulk_update and one delete, plus
+    one bulk write per kind of recurring rule change.
+    """
+    results = [None] * len(operations)
+    ids = [op.get("id") for op in operations if isinstance(op, dict) and op.get("op") != "create"]
+    owned = Expense.objects.filter(user=user, id__in=[i for i in ids if is_plain_int(i)]).in_bulk()
+
+    creates = []
+    updates = []
+    deletes = []
+    seen_ids = set()
+
+    for index, op in enumerate(operations):
+        kind = op.get("op") if isinstance(op, dict) else None
+        result = {"index": index, "op": kind}
+        results[index] = result
+
+        if kind not in BATCH_OPERATIONS:
+            result["errors"] = {"op": [f"Must be one of: {', '.join(BATCH_OPERATIONS)}."]}
+            continue
+
+        if kind != "create":
+            if not is_plain_int(op.get("id")):
+                result["errors"] = {"id": ["A valid integer is required."]}
+                continue
+            expense = owned.get(op.get("id"))
+            if expense is None:
+                result["errors"] = {"id": ["Expense not found."]}
+                continue
+            if expense.pk in seen_ids:
+                result["errors"] = {"id": ["Expense appears in more than one operation."]}
+                continue
+            seen_ids.add(expense.pk)
+
+        if kind == "delete":
+            deletes.append((index, expense))
+            continue
+
+        serializer = (
+            ExpenseSerializer(data=op.get("data"))
+            if kind == "create"
+            else ExpenseSerializer(expense, data=op.get("data"), partial=True)
+        )
+        if not serializer.is_valid():
+            result["errors"] = serializer.errors
+            continue
+
+        if kind == "create":
+            creates.append((index, Expense(user=user, **serializer.validated_data)))
+        else:
+            was_recurring = expense.is_recurring
+            for name, value in serializer.validated_data.items():
+                setattr(expense, name, value)
+            updates.append((index, expense, set(serializer.validated_data), was_recurring))
+
+    if any("errors" in result for result in results):
+        for result in results:
+            result.setdefault("status", "error" if "errors" in result else "skipped")
+        return False, results
+
+    with transaction.atomic(using=router.db_for_write(Expense)):
+        created = Expense.objects.bulk_create([expense for _, expense in creates])
+
+        update_fields = set().union(*(fields for _, _, fields, _ in updates))
+        if update_fields:
+            Expense.objects.bulk_update([expense for _, expense, _, _ in updates], list(update_fields))
+        sync_recurring_rules([(expense, was_recurring) for _, expense, _, was_recurring in updates])
+
+        if deletes:
+            stop_recurring_rules([expense for _, expense in deletes])
+            Expense.objects.filter(
+                user=user,
+                id__in=[expense.pk for _, expense in deletes]
+            ).delete()
+
+        create_recurring_rules([expense for expense in created if expense.is_recurring])
+
+    for (index, _), expense in zip(creates, created):
+        results[index].update(status="created", expense=ExpenseSerializer(expense).data)
+    for index, expense, _, _ in updates:
+        results[index].update(status="updated", expense=ExpenseSerializer(expense).data)
+    for index, expense in deletes:
+        results[index].update(status="deleted", id=expense.pk)
 
-    return snapshot
+    return True, results
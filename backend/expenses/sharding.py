@@ -0,0 +1,107 @@
+"""
+Moving users' expenses data between shards.
+"""
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from backend.routers import on_shard, shard_aliases, shard_for_user
+
+from .models import (
+    Budget,
+    Expense,
+    MonthlyIncome,
+    RecurringRule,
+    SavingsSnapshot,
+    SpendingRollup,
+)
+from .signals import mirror_user
+
+
+# Rows owned by a user; rollups and snapshots are derived and rebuilt on
+# the target by the maintained bulk paths rather than copied.
+SOURCE_MODELS = (RecurringRule, Expense, Budget, MonthlyIncome)
+DERIVED_MODELS = (SpendingRollup, SavingsSnapshot)
+
+
+def users_on(alias):
+    """
+    Ids of the users that have any expenses data on `alias`.
+    """
+    user_ids = set()
+    for model in SOURCE_MODELS + DERIVED_MODELS:
+        user_ids.update(
+            model.objects.using(alias).order_by().values_list("user_id", flat=True).distinct()
+        )
+    return user_ids
+
+
+def misplaced_users():
+    """
+    {user_id: (current alias, expected alias)} for users whose data sits
+    on a shard their hash no longer maps to.
+    """
+    moves = {}
+    for alias in shard_aliases():
+        for user_id in users_on(alias):
+            expected = shard_for_user(user_id)
+            if expected != alias:
+                moves[user_id] = (alias, expected)
+    return moves
+
+
+def missing_mirrors():
+    """
+    Users with no copy of their auth row on their shard.
+    """
+    missing = []
+    for alias in shard_aliases():
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+        mirrored = set(User.objects.using(alias).values_list("pk", flat=True))
+        missing += [
+            user for user in User.objects.using(DEFAULT_DB_ALIAS).order_by("pk")
+            if shard_for_user(user.pk) == alias and user.pk not in mirrored
+        ]
+    return missing
+
+
+def move_user(user_id, source, target):
+    """
+    Copy a user's expenses data from `source` to `target`, then remove it
+    from `source`. Rows get new ids on the target. Re-running after a
+    failure between the two steps is safe: the target copy is replaced.
+    """
+    with on_shard(target), transaction.atomic(using=target):
+        if target != DEFAULT_DB_ALIAS:
+            mirror_user(User.objects.using(DEFAULT_DB_ALIAS).get(pk=user_id), target)
+
+        for model in SOURCE_MODELS + DERIVED_MODELS:
+            model.objects.using(target).filter(user_id=user_id).delete()
+
+        rules = list(RecurringRule.objects.using(source).filter(user_id=user_id).order_by("pk"))
+        old_rule_ids = [rule.pk for rule in rules]
+        for rule in rules:
+            rule.pk = None
+        RecurringRule.objects.using(target).bulk_create(rules)
+        rule_ids = {old: rule.pk for old, rule in zip(old_rule_ids, rules)}
+
+        expenses = list(Expense.objects.using(source).filter(user_id=user_id))
+        for expense in expenses:
+            expense.pk = None
+            expense.rule_id = rule_ids.get(expense.rule_id)
+        Expense.objects.using(target).bulk_create(expenses, batch_size=500)
+
+        for model in (Budget, MonthlyIncome):
+            rows = list(model.objects.using(source).filter(user_id=user_id))
+            for row in rows:
+                row.pk = None
+            model.objects.using(target).bulk_create(rows, batch_size=500)
+
+    with on_shard(source), transaction.atomic(using=source):
+        for model in SOURCE_MODELS + DERIVED_MODELS:
+            model.objects.using(source).filter(user_id=user_id).delete()
+        if source != DEFAULT_DB_ALIAS:
+            User.objects.using(source).filter(pk=user_id).delete()
+
+    return len(expenses)
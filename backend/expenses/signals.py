@@ -0,0 +1,46 @@
+import copy
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.authentication import forget_user
+from backend.routers import shard_for_user
+
+
+def mirror_user(user, alias):
+    """
+    Insert or refresh the copy of `user` on shard `alias`, so the expenses
+    tables there can keep their foreign key to auth_user.
+    """
+    fields = [f.attname for f in User._meta.concrete_fields if not f.primary_key]
+    User.objects.using(alias).bulk_create(
+        # bulk_create re-binds the instance to `alias`; keep the caller's intact
+        [copy.copy(user)],
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=fields,
+    )
+
+
+@receiver(post_save, sender=User)
+def mirror_saved_user(sender, instance, using, **kwargs):
+    shard = shard_for_user(instance.pk)
+    if using == DEFAULT_DB_ALIAS and shard != DEFAULT_DB_ALIAS:
+        mirror_user(instance, shard)
+
+
+@receiver(post_delete, sender=User)
+def delete_user_from_shard(sender, instance, using, **kwargs):
+    shard = shard_for_user(instance.pk)
+    if using == DEFAULT_DB_ALIAS and shard != DEFAULT_DB_ALIAS:
+        # Cascades to the user's expenses data on the shard
+        User.objects.using(shard).filter(pk=instance.pk).delete()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, using, **kwargs):
+    # After commit, so a concurrent request can't re-cache the old row
+    transaction.on_commit(lambda: forget_user(instance.pk), using=using)
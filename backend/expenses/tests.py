@@ -1,3 +1,1390 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import date
+from importlib import import_module
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from rest_framework.renderers import JSONRenderer
+
+from backend.metrics import registry
+from backend.middleware import ReplicaRoutingMiddleware
+from backend.renderers import FastJSONRenderer
+from backend.routers import (
+    PrimaryReplicaRouter,
+    ShardNotSelected,
+    ShardRouter,
+    shard_for_user,
+    sticky_key,
+    user_shard,
+)
+
+from . import exports, urls
+from .models import (
+    Budget,
+    Expense,
+    MonthlyIncome,
+    RecurringRule,
+    SavingsSnapshot,
+    SpendingRollup,
+    SpendingRollupManager,
+    add_months,
+    apply_expense_deltas,
+    expense_deltas,
+)
+from .serializers import BudgetSerializer, ExpenseSerializer, budget_values, expense_values
+from .services import MAX_HISTORY_MONTHS, calculate_savings, generate_recurring_expenses
+
+
+class DashboardReadOnlyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        MonthlyIncome.objects.create(user=self.user, month=date(2025, 2, 1), amount=1000)
+        MonthlyIncome.objects.create(user=self.user, month=date(2025, 3, 1), amount=1000)
+        Budget.objects.create(user=self.user, month=date(2025, 3, 1), category="food", amount=300)
+        Expense.objects.create(user=self.user, amount=200, category="food", date=date(2025, 2, 10))
+        Expense.objects.create(user=self.user, amount=150, category="food", date=date(2025, 3, 5))
+
+    def test_dashboard_get_issues_no_writes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/dashboard/?year=2025&month=3")
+
+        self.assertEqual(response.status_code, 200)
+
+        writes = [
+            query["sql"] for query in ctx.captured_queries
+            if query["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_savings_snapshot_maintained_on_write(self):
+        snapshot = SavingsSnapshot.objects.get(user=self.user, month=date(2025, 3, 1))
+        self.assertEqual(snapshot.savings_balance, 1650)
+
+        response = self.client.get("/api/dashboard/?year=2025&month=3")
+        self.assertEqual(response.data["savings_balance"], 1650)
+
+
+class SpendingRollupMaintenanceTests(TestCase):
+    """
+    After every kind of expense write, SpendingRollup must equal a fresh
+    aggregation of the raw rows.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollups", password="secret123")
+        self.other = User.objects.create_user(username="rollups-other", password="secret123")
+        self.expenses = [
+            Expense.objects.create(user=self.user, amount=amount, category=category, date=day)
+            for amount, category, day in [
+                ("10.50", "food", date(2025, 1, 5)),
+                ("20.00", "food", date(2025, 1, 20)),
+                ("7.25", "travel", date(2025, 2, 1)),
+                ("100.00", "rent", date(2025, 3, 1)),
+            ]
+        ]
+        Expense.objects.create(user=self.other, amount="3.00", category="food", date=date(2025, 1, 9))
+
+    def assertRollupsMatch(self):
+        stored = {
+            (row.user_id, row.month, row.category): (row.total, row.expense_count)
+            for row in SpendingRollup.objects.all()
+        }
+        self.assertEqual(stored, Expense.objects.rollup_totals())
+
+    def test_create(self):
+        self.assertRollupsMatch()
+
+    def test_save_moving_date_and_category(self):
+        expense = self.expenses[0]
+        expense.amount = "11.00"
+        expense.save()
+        self.assertRollupsMatch()
+
+        expense.date = date(2025, 4, 2)
+        expense.category = "shopping"
+        expense.save()
+        self.assertRollupsMatch()
+
+    def test_save_with_update_fields(self):
+        expense = self.expenses[1]
+        expense.category = "other"
+        expense.amount = "99.00"
+        # amount is not written, so only the category moves
+        expense.save(update_fields=["category"])
+        self.assertRollupsMatch()
+
+        expense.refresh_from_db()
+        expense.date = date(2024, 12, 31)
+        expense.save(update_fields=["date", "note"])
+        self.assertRollupsMatch()
+
+    def test_queryset_update(self):
+        Expense.objects.filter(user=self.user, category="food").update(category="travel")
+        self.assertRollupsMatch()
+
+        Expense.objects.filter(user=self.user).update(date=date(2025, 6, 15))
+        self.assertRollupsMatch()
+
+    def test_bulk_update(self):
+        for i, expense in enumerate(self.expenses):
+            expense.amount = f"{i + 1}.00"
+            expense.date = date(2025, 5, i + 1)
+        Expense.objects.bulk_update(self.expenses, ["amount", "date"], batch_size=2)
+        self.assertRollupsMatch()
+
+    def test_bulk_create(self):
+        Expense.objects.bulk_create([
+            Expense(user=self.user, amount="1.00", category="food", date=date(2025, 1, day))
+            for day in range(1, 11)
+        ] + [Expense(user=self.other, amount="2.00", category="other", date=date(2025, 7, 1))])
+        self.assertRollupsMatch()
+
+    def test_instance_delete(self):
+        self.expenses[0].delete()
+        self.assertRollupsMatch()
+
+        # Deleting the last expense of a bucket removes the bucket
+        self.expenses[2].delete()
+        self.assertRollupsMatch()
+        self.assertFalse(SpendingRollup.objects.filter(category="travel").exists())
+
+    def test_queryset_delete(self):
+        Expense.objects.filter(user=self.user, date__lt=date(2025, 3, 1)).delete()
+        self.assertRollupsMatch()
+
+        Expense.objects.all().delete()
+        self.assertRollupsMatch()
+
+    @patch.object(SpendingRollupManager, "UPSERT_BATCH_SIZE", 7)
+    def test_upsert_spanning_several_statements(self):
+        # Existing buckets are incremented in place, new ones inserted
+        expenses = [
+            Expense(user=self.user, amount="1.25", category=category, date=add_months(date(2024, 7, 1), i))
+            for i in range(12)
+            for category, _ in Expense.CATEGORY_CHOICES
+        ]
+        with transaction.atomic():
+            Expense.objects.bulk_create(expenses, maintain_rollups=False)
+            apply_expense_deltas("default", expense_deltas(expenses))
+        self.assertRollupsMatch()
+
+        # Negative deltas go through the same upsert
+        Expense.objects.filter(user=self.user, amount="1.25").delete()
+        self.assertRollupsMatch()
+
+
+class SavingsSnapshotChainTests(TestCase):
+    """
+    A write to an old month must carry through every later snapshot.
+    """
+
+    MONTHS = [date(2025, month, 1) for month in range(1, 5)]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="saver", password="secret123")
+        self.incomes = [
+            MonthlyIncome.objects.create(user=self.user, month=month, amount=1000)
+            for month in self.MONTHS
+        ]
+        self.expense = Expense.objects.create(user=self.user, amount=100, category="food", date=date(2025, 1, 10))
+        for month in self.MONTHS[1:]:
+            Expense.objects.create(user=self.user, amount=50, category="food", date=month)
+
+    def assertBalances(self, balances):
+        self.assertEqual(
+            list(SavingsSnapshot.objects.filter(user=self.user).values_list("savings_balance", flat=True)),
+            balances
+        )
+        # Raises CommandError on drift
+        call_command("verify_savings", stdout=io.StringIO())
+
+    def test_initial_chain(self):
+        self.assertBalances([900, 1850, 2800, 3750])
+
+    def test_editing_an_old_expense(self):
+        self.expense.amount = 300
+        self.expense.save()
+        self.assertBalances([700, 1650, 2600, 3550])
+
+    def test_moving_an_old_expense_forward(self):
+        self.expense.date = date(2025, 3, 2)
+        self.expense.save()
+        self.assertBalances([1000, 1950, 2800, 3750])
+
+    def test_deleting_an_old_expense(self):
+        self.expense.delete()
+        self.assertBalances([1000, 1950, 2900, 3850])
+
+    def corrupt(self):
+        other = User.objects.create_user(username="spender", password="secret123")
+        MonthlyIncome.objects.create(user=other, month=self.MONTHS[2], amount=500)
+        # A month without flows of its own carries the previous balance
+        SavingsSnapshot.objects.create(user=self.user, month=date(2025, 6, 1), savings_balance=0)
+        SavingsSnapshot.objects.filter(month=self.MONTHS[2]).update(savings_balance=1)
+        return other
+
+    def test_verify_savings_fixes_drift(self):
+        other = self.corrupt()
+        with self.assertRaises(CommandError):
+            call_command("verify_savings", stdout=io.StringIO())
+
+        call_command("verify_savings", fix=True, stdout=io.StringIO())
+        self.assertBalances([900, 1850, 2800, 3750, 3750])
+        self.assertEqual(SavingsSnapshot.objects.get(user=other).savings_balance, 500)
+
+    def test_recompute_migration(self):
+        migration = import_module("expenses.migrations.0007_recompute_savings_snapshots")
+        other = self.corrupt()
+
+        migration.recompute_snapshots(apps, SimpleNamespace(connection=connection))
+        self.assertBalances([900, 1850, 2800, 3750, 3750])
+        self.assertEqual(SavingsSnapshot.objects.get(user=other).savings_balance, 500)
+
+    def test_editing_an_old_income(self):
+        self.incomes[0].amount = 400
+        self.incomes[0].save()
+        self.assertBalances([300, 1250, 2200, 3150])
+
+    def test_deleting_an_old_income(self):
+        self.incomes[1].delete()
+        self.assertBalances([900, 850, 1800, 2750])
+
+
+class SavingsHistoryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="historian", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        # Before the requested range: carried in as the opening balance
+        MonthlyIncome.objects.create(user=self.user, month=date(2024, 11, 1), amount=500)
+        Expense.objects.create(user=self.user, amount=120, category="food", date=date(2024, 12, 3))
+        # In range, with February and April left without any activity
+        MonthlyIncome.objects.create(user=self.user, month=date(2025, 1, 1), amount=1000)
+        Expense.objects.create(user=self.user, amount=300, category="rent", date=date(2025, 1, 2))
+        Expense.objects.create(user=self.user, amount=80, category="food", date=date(2025, 3, 15))
+
+    def history(self, query):
+        return self.client.get(f"/api/savings/history/?{query}")
+
+    def test_history_rows(self):
+        response = self.history("from=2025-01&to=2025-04")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["from"], response.data["to"]), ("2025-01", "2025-04"))
+
+        rows = [
+            (row["month"], row["income"], row["spent"], row["monthly_balance"], row["savings_balance"])
+            for row in response.data["months"]
+        ]
+        self.assertEqual(rows, [
+            ("2025-01", 1000, 300, 700, 1080),
+            ("2025-02", 0, 0, 0, 1080),
+            ("2025-03", 0, 80, -80, 1000),
+            ("2025-04", 0, 0, 0, 1000),
+        ])
+
+    def test_matches_calculate_savings(self):
+        response = self.history("from=2024-10&to=2025-05")
+
+        for row in response.data["months"]:
+            year, month = (int(part) for part in row["month"].split("-"))
+            self.assertEqual(row["savings_balance"], calculate_savings(self.user, year, month), row["month"])
+
+    def test_default_range_is_the_last_twelve_months(self):
+        response = self.history("to=2025-03")
+        self.assertEqual(response.data["from"], "2024-04")
+        self.assertEqual(len(response.data["months"]), 12)
+
+    def test_invalid_ranges_are_rejected(self):
+        for query in (
+            "from=2025-04&to=2025-01",
+            "from=1-01&to=9999-12",
+            "from=2015-01&to=2025-01",
+            "from=2025-13&to=2026-01",
+            "to=1-05",
+            "to=March",
+        ):
+            response = self.history(query)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn("error", response.data)
+
+    def test_longest_range_and_the_last_month(self):
+        response = self.history("from=2016-02&to=2026-01")
+        self.assertEqual(len(response.data["months"]), MAX_HISTORY_MONTHS)
+
+        response = self.history("from=9999-01&to=9999-12")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["months"][-1]["month"], "9999-12")
+
+
+class MonthBundleTests(TestCase):
+
+    SECTIONS = {
+        "dashboard": "/api/dashboard/",
+        "expenses": "/api/expenses/",
+        "budgets": "/api/budgets/",
+        "insights": "/api/insights/",
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bundler", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        MonthlyIncome.objects.create(user=self.user, month=date(2025, 2, 1), amount="4000.00")
+        MonthlyIncome.objects.create(user=self.user, month=date(2025, 3, 1), amount="4200.50")
+        Budget.objects.bulk_create([
+            Budget(user=self.user, month=date(2025, 3, 1), category="food", amount="400.00"),
+            Budget(user=self.user, month=date(2025, 3, 1), category="rent", amount=1500),
+            Budget(user=self.user, month=date(2025, 2, 1), category="food", amount=350),
+        ])
+        for amount, category, day in [
+            ("120.25", "food", date(2025, 2, 10)),
+            ("95.10", "food", date(2025, 3, 3)),
+            ("1500", "rent", date(2025, 3, 1)),
+            ("42.00", "travel", date(2025, 3, 20)),
+        ]:
+            Expense.objects.create(user=self.user, amount=amount, category=category, date=day)
+
+    def test_sections_match_the_standalone_endpoints(self):
+        for query in ("year=2025&month=3", "year=2025&month=2", "year=2024&month=1"):
+            bundle = self.client.get(f"/api/month/?{query}").json()
+
+            self.assertEqual(set(bundle), set(self.SECTIONS))
+            for section, path in self.SECTIONS.items():
+                self.assertEqual(
+                    bundle[section],
+                    self.client.get(f"{path}?{query}").json(),
+                    f"{section} for {query}"
+                )
+
+
+class ResponseCacheTests(TestCase):
+
+    MONTH = date(2025, 3, 1)
+    BUDGETS = "/api/budgets/?year=2025&month=3"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.budget = Budget.objects.create(user=self.user, month=self.MONTH, category="food", amount=300)
+        self.etag = self.client.get(self.BUDGETS)["ETag"]
+
+    def revalidate(self, path=BUDGETS):
+        return self.client.get(path, HTTP_IF_NONE_MATCH=self.etag)
+
+    def write(self, action):
+        # Versions are bumped when the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.revalidate()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], self.etag)
+
+    def test_stale_etag_gets_the_response(self):
+        response = self.client.get(self.BUDGETS, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], self.etag)
+
+    def test_writes_to_the_month_refresh_the_response(self):
+        writes = [
+            lambda: Expense.objects.create(user=self.user, amount=20, category="food", date=date(2025, 3, 9)),
+            lambda: Budget.objects.create(user=self.user, month=self.MONTH, category="rent", amount=900),
+            lambda: MonthlyIncome.objects.create(user=self.user, month=self.MONTH, amount=1000),
+        ]
+        for action in writes:
+            self.write(action)
+
+            response = self.revalidate()
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], self.etag)
+            self.etag = response["ETag"]
+
+        self.assertEqual(
+            sorted(row["category"] for row in response.data),
+            ["food", "rent"]
+        )
+
+    def test_budget_update_is_not_served_from_cache(self):
+        self.write(lambda: Budget.objects.filter(pk=self.budget.pk).update(amount=450))
+
+        response = self.client.get(self.BUDGETS)
+        self.assertEqual(response.data[0]["amount"], "450.00")
+
+    def test_writes_to_another_month_keep_the_etag(self):
+        self.write(lambda: Expense.objects.create(
+            user=self.user, amount=20, category="food", date=date(2025, 5, 9)
+        ))
+        self.assertEqual(self.revalidate().status_code, 304)
+
+
+class ExpensePaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="pager", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        # Mostly one shared date, so pages split inside a run of equal dates
+        days = [date(2025, 3, 10)] * 7 + [date(2025, 3, 12), date(2025, 2, 28), date(2025, 1, 1)]
+        self.expenses = [
+            Expense.objects.create(user=self.user, amount=i + 1, category="food", date=day)
+            for i, day in enumerate(days)
+        ]
+
+    def pages(self, limit):
+        pages = []
+        path = f"/api/expenses/?from=2025-01-01&limit={limit}"
+        cursor = None
+        while True:
+            response = self.client.get(path + (f"&cursor={cursor}" if cursor else ""))
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            cursor = response.data["next"]
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = [
+            expense.pk for expense in
+            sorted(self.expenses, key=lambda expense: (expense.date, expense.pk), reverse=True)
+        ]
+
+        for limit in (1, 3, 4):
+            pages = self.pages(limit)
+            self.assertEqual([pk for page in pages for pk in page], expected)
+            self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+
+    def test_last_page_has_no_next(self):
+        response = self.client.get("/api/expenses/?from=2025-01-01&limit=10")
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get("/api/expenses/?from=2025-01-01&limit=9")
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(f"/api/expenses/?limit=9&cursor={response.data['next']}")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ("not-a-cursor", "WzFd", "eyJhIjogMX0", "WyJ4IiwgMV0"):
+            response = self.client.get(f"/api/expenses/?cursor={cursor}")
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertIn("error", response.data)
+
+    def test_invalid_limit_is_rejected(self):
+        for limit in ("0", "-5", "ten", ""):
+            response = self.client.get(f"/api/expenses/?limit={limit}")
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertIn("error", response.data)
+
+    def test_cached_limit_page_sees_writes_to_other_months(self):
+        first = self.client.get("/api/expenses/?limit=3")
+        self.assertEqual(first.status_code, 200)
+
+        # Not this month, so only the ledger version changes
+        with self.captureOnCommitCallbacks(execute=True):
+            later = Expense.objects.create(
+                user=self.user, amount=5, category="food", date=add_months(date.today().replace(day=1), 1)
+            )
+
+        response = self.client.get("/api/expenses/?limit=3")
+        self.assertEqual(response.data["results"][0]["id"], later.pk)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_year_and_month_page_through_that_month(self):
+        response = self.client.get("/api/expenses/?year=2025&month=3&limit=5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 5)
+
+        rows = response.data["results"]
+        cursor = response.data["next"]
+        while cursor:
+            response = self.client.get(f"/api/expenses/?year=2025&month=3&limit=5&cursor={cursor}")
+            rows += response.data["results"]
+            cursor = response.data["next"]
+
+        self.assertEqual(
+            sorted(row["id"] for row in rows),
+            sorted(expense.pk for expense in self.expenses if expense.date.month == 3)
+        )
+
+    def test_year_and_month_cannot_be_mixed_with_a_date_range(self):
+        response = self.client.get("/api/expenses/?year=2025&month=3&from=2025-01-01")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.data)
+
+    def test_invalid_month_with_page_params_is_rejected(self):
+        for query in ("year=2025&month=13", "year=abc&month=1", "year=9999&month=12"):
+            response = self.client.get(f"/api/expenses/?{query}&limit=5")
+            self.assertEqual(response.status_code, 400, query)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica", REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="router", password="secret123")
+        self.token = str(AccessToken.for_user(self.user))
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+    def route(self, method, status=200, token=True):
+        """
+        Run a request through the middleware; returns the alias Expense
+        reads were routed to inside the view.
+        """
+        seen = {}
+
+        def view(request):
+            seen["alias"] = self.router.db_for_read(Expense)
+            return HttpResponse(status=status)
+
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"} if token else {}
+        request = getattr(self.factory, method)("/api/expenses/", **headers)
+        ReplicaRoutingMiddleware(view)(request)
+        return seen["alias"]
+
+    def test_get_reads_from_replica(self):
+        self.assertEqual(self.route("get"), "replica")
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertIsNone(self.route("post", status=201))
+        self.assertIsNone(self.route("get"))
+
+        cache.delete(sticky_key(self.user.pk))
+        self.assertEqual(self.route("get"), "replica")
+
+    def test_failed_write_does_not_pin_reads(self):
+        self.route("post", status=400)
+        self.assertEqual(self.route("get"), "replica")
+
+    def test_requests_without_a_token_use_primary(self):
+        self.assertIsNone(self.route("get", token=False))
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(Expense))
+
+
+@override_settings(DATABASE_SHARDS=["default", "shard_1", "shard_2"])
+class ShardRouterTests(TestCase):
+
+    def setUp(self):
+        self.router = ShardRouter()
+
+    def test_auth_models_stay_on_default(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertIsNone(self.router.db_for_write(User))
+
+    def test_instance_routes_to_its_users_shard(self):
+        for user_id in range(1, 20):
+            expense = Expense(user_id=user_id)
+            self.assertEqual(
+                self.router.db_for_write(Expense, instance=expense),
+                shard_for_user(user_id)
+            )
+
+    def test_queries_need_a_selected_shard(self):
+        with self.assertRaises(ShardNotSelected):
+            self.router.db_for_read(Expense)
+
+        with user_shard(7):
+            self.assertEqual(self.router.db_for_read(Expense), shard_for_user(7))
+
+    def test_users_spread_over_every_shard(self):
+        shards = {shard_for_user(user_id) for user_id in range(1, 100)}
+        self.assertEqual(shards, {"default", "shard_1", "shard_2"})
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", password="secret123")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/budgets/?year=2025&month=3")
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]]
+
+    def test_warm_requests_skip_the_user_query(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_user_change_drops_the_cached_user(self):
+        self.user_queries()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        response = self.client.get("/api/budgets/?year=2025&month=3")
+        self.assertEqual(response.status_code, 401)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.create_user(username="ops", password="secret123", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_reports_server_timing(self):
+        response = self.client.get("/api/budgets/?year=2025&month=3")
+
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn(
+            'pycheck_db_queries_count{view="expenses.views.BudgetListCreateView"} 1',
+            self.client.get("/api/metrics/").content.decode()
+        )
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_off_records_nothing(self):
+        with patch.object(BaseDatabaseWrapper, "execute_wrapper") as execute_wrapper:
+            response = self.client.get("/api/budgets/?year=2025&month=3")
+
+        self.assertEqual(response.status_code, 200)
+        execute_wrapper.assert_not_called()
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(registry.render(), "\n")
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_authenticate(User.objects.create_user(username="user", password="secret123"))
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+
+class InlineExecutor:
+    """
+    ProcessPoolExecutor stand-in running the workers one after another in
+    this process, where the test transaction's rows are visible.
+    """
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, *iterables):
+        return list(map(fn, *iterables))
+
+
+class RecurringGenerationTests(TestCase):
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"generator-{i}", password="secret123")
+            for i in range(4)
+        ]
+        self.user = self.users[0]
+
+    def rule(self, next_due, day_of_month=None, user=None, **kwargs):
+        return RecurringRule.objects.create(
+            user=user or self.user,
+            amount=kwargs.pop("amount", 40),
+            category="rent",
+            day_of_month=day_of_month or next_due.day,
+            next_due=next_due,
+            **kwargs
+        )
+
+    def generate(self, today, **options):
+        out = io.StringIO()
+        call_command("generate_recurring", date=today.isoformat(), stdout=out, **options)
+        return out.getvalue()
+
+    def dates(self, rule):
+        return list(
+            Expense.objects.filter(rule=rule).order_by("date").values_list("date", flat=True)
+        )
+
+    def test_rerun_on_the_same_day_creates_nothing(self):
+        rule = self.rule(date(2025, 3, 5))
+
+        self.generate(date(2025, 3, 5))
+        self.assertIn("inserted 0 expenses", self.generate(date(2025, 3, 5)))
+        self.assertEqual(self.dates(rule), [date(2025, 3, 5)])
+
+    def test_missed_months_are_caught_up_once_each(self):
+        rule = self.rule(date(2025, 1, 15))
+
+        self.assertIn("inserted 4 expenses", self.generate(date(2025, 4, 20)))
+        self.assertEqual(
+            self.dates(rule),
+            [date(2025, 1, 15), date(2025, 2, 15), date(2025, 3, 15), date(2025, 4, 15)]
+        )
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_due, date(2025, 5, 15))
+
+        # The catch-up is in the rollups and snapshots too
+        self.assertEqual(
+            SpendingRollup.objects.get(user=self.user, month=date(2025, 2, 1)).total, 40
+        )
+        call_command("verify_savings", stdout=io.StringIO())
+
+    def test_day_31_is_clamped_in_short_months(self):
+        rule = self.rule(date(2025, 1, 31), day_of_month=31)
+
+        self.generate(date(2025, 5, 1))
+        self.assertEqual(
+            self.dates(rule),
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+        )
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_due, date(2025, 5, 31))
+
+    def test_stopped_rule_generates_nothing(self):
+        rule = self.rule(date(2025, 1, 10), is_active=False)
+
+        self.generate(date(2025, 6, 1))
+        self.assertEqual(generate_recurring_expenses(self.user, today=date(2025, 6, 1)), 0)
+
+        self.assertEqual(self.dates(rule), [])
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_due, date(2025, 1, 10))
+
+    def outcome(self):
+        return (
+            sorted(Expense.objects.values_list("user_id", "rule_id", "date", "amount")),
+            sorted(RecurringRule.objects.values_list("pk", "next_due")),
+        )
+
+    @patch("expenses.management.commands.generate_recurring.ProcessPoolExecutor", InlineExecutor)
+    def test_worker_pool_matches_a_serial_run(self):
+        for i, user in enumerate(self.users):
+            for j in range(3):
+                self.rule(date(2025, 1 + j, 1 + i * 7), user=user, amount=10 * i + j)
+        self.rule(date(2025, 1, 1), user=self.users[1], is_active=False)
+
+        with transaction.atomic():
+            self.generate(date(2025, 6, 30), workers=3, chunk_size=2)
+            pooled = self.outcome()
+            transaction.set_rollback(True)
+
+        self.generate(date(2025, 6, 30))
+        serial = self.outcome()
+
+        self.assertEqual(pooled, serial)
+        self.assertEqual(len(serial[0]), sum(6 - j for j in range(3)) * len(self.users))
+
+
+class RecurringRuleLifecycleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="recurring", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start = add_months(date.today().replace(day=1), -2)
+
+    def create(self, is_recurring=True):
+        response = self.client.post("/api/expenses/", {
+            "amount": "100.00", "category": "rent", "date": self.start.isoformat(),
+            "is_recurring": is_recurring, "recurrence_day": 1,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return Expense.objects.get(pk=response.data["id"])
+
+    def generate(self):
+        return self.client.post("/api/expenses/generate-recurring/").data["created"]
+
+    def test_unflagging_stops_the_rule(self):
+        expense = self.create()
+        response = self.client.put(f"/api/expenses/{expense.pk}/update/", {"is_recurring": False}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RecurringRule.objects.get(pk=expense.rule_id).is_active)
+        self.assertEqual(self.generate(), 0)
+
+    def test_deleting_the_originating_expense_stops_the_rule(self):
+        expense = self.create()
+        self.assertEqual(self.generate(), 2)
+
+        # Deleting a generated occurrence leaves the rule running
+        occurrence = Expense.objects.filter(rule_id=expense.rule_id).exclude(pk=expense.pk).first()
+        self.client.delete(f"/api/expenses/{occurrence.pk}/")
+        self.assertTrue(RecurringRule.objects.get(pk=expense.rule_id).is_active)
+
+        self.client.delete(f"/api/expenses/{expense.pk}/")
+        self.assertFalse(RecurringRule.objects.get(pk=expense.rule_id).is_active)
+
+    def test_flagging_an_expense_starts_a_rule(self):
+        expense = self.create(is_recurring=False)
+        response = self.client.put(f"/api/expenses/{expense.pk}/update/", {"is_recurring": True}, format="json")
+
+        self.assertIsNotNone(response.data["rule"])
+        self.assertEqual(self.generate(), 2)
+
+    def test_reflagging_resumes_without_backfilling(self):
+        expense = self.create()
+        self.client.put(f"/api/expenses/{expense.pk}/update/", {"is_recurring": False}, format="json")
+        self.client.put(f"/api/expenses/{expense.pk}/update/", {"is_recurring": True}, format="json")
+
+        rule = RecurringRule.objects.get(pk=expense.rule_id)
+        self.assertTrue(rule.is_active)
+        self.assertGreaterEqual(rule.next_due, date.today())
+
+    def test_batch_delete_stops_the_rule(self):
+        expense = self.create()
+        response = self.client.post("/api/expenses/batch/", {
+            "operations": [{"op": "delete", "id": expense.pk}]
+        }, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.generate(), 0)
+
+
+class ExpenseBatchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="batcher", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.expense = Expense.objects.create(user=self.user, amount=10, category="food", date=date(2025, 3, 1))
+
+    def test_non_integer_ids_are_reported(self):
+        for bad_id in ([self.expense.pk], {"id": 1}, "1", True, None):
+            with self.subTest(id=bad_id):
+                response = self.client.post("/api/expenses/batch/", {
+                    "operations": [{"op": "delete", "id": bad_id}]
+                }, format="json")
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(
+                    response.data["results"][0]["errors"],
+                    {"id": ["A valid integer is required."]}
+                )
+
+        self.assertTrue(Expense.objects.filter(pk=self.expense.pk).exists())
+
+    def recurring_batch(self, count):
+        operations = [
+            {"op": "create", "data": {
+                "amount": f"{i + 1}.00", "category": "rent", "date": "2025-03-01",
+                "is_recurring": True, "recurrence_day": 1,
+            }}
+            for i in range(count)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/expenses/batch/", {"operations": operations}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_recurring_creates_take_a_fixed_number_of_queries(self):
+        one = self.recurring_batch(1)
+        many = self.recurring_batch(20)
+
+        self.assertEqual(many, one)
+        self.assertEqual(RecurringRule.objects.count(), 21)
+        self.assertFalse(Expense.objects.filter(is_recurring=True, rule=None).exists())
+        self.assertEqual(
+            set(RecurringRule.objects.values_list("next_due", flat=True)), {date(2025, 4, 1)}
+        )
+
+    def test_recurring_flag_changes_take_a_fixed_number_of_queries(self):
+        def toggle(expenses, flag):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post("/api/expenses/batch/", {"operations": [
+                    {"op": "update", "id": expense.pk, "data": {"is_recurring": flag}}
+                    for expense in expenses
+                ]}, format="json")
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        few = [self.expense]
+        many = [
+            Expense.objects.create(user=self.user, amount=i + 1, category="food", date=date(2025, 3, 2))
+            for i in range(10)
+        ]
+
+        # Start, stop, then resume the same rules
+        for flag in (True, False, True):
+            self.assertEqual(toggle(many, flag), toggle(few, flag), flag)
+
+        # Every expense got its own rule, and all of them run again
+        self.assertFalse(Expense.objects.filter(rule=None).exists())
+        self.assertEqual(RecurringRule.objects.filter(is_active=True).count(), 11)
+
+
+class ExpenseImportTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="importer", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name="expenses.csv"):
+        return self.client.post(
+            "/api/expenses/import/",
+            {"file": SimpleUploadedFile(name, content)},
+            format="multipart"
+        )
+
+    def test_valid_rows_are_imported(self):
+        response = self.upload(b"amount,category,date,note\n12.50,food,2025-03-01,\n1.2.3,food,2025-03-01,\n")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["imported"], response.data["failed"]), (1, 1))
+
+    def test_non_utf8_upload_is_rejected(self):
+        response = self.upload(b"amount,category,date,note\n12.50,food,2025-03-01,caf\xe9\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_malformed_csv_is_rejected(self):
+        oversized = b"x" * (csv.field_size_limit() + 1)
+        response = self.upload(b"amount,category,date,note\n12.50,food,2025-03-01," + oversized + b"\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+
+class ExpenseExportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="exporter", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.expenses = [
+            Expense.objects.create(user=self.user, amount="12.50", category="food", date=date(2025, 1, 5), note='Lunch, "big"'),
+            Expense.objects.create(user=self.user, amount="900.00", category="rent", date=date(2025, 2, 1), note="Café"),
+            Expense.objects.create(user=self.user, amount="3.20", category="travel", date=date(2025, 3, 9)),
+        ]
+        other = User.objects.create_user(username="exporter-other", password="secret123")
+        Expense.objects.create(user=other, amount="1.00", category="food", date=date(2025, 2, 2))
+
+    def export(self, query=""):
+        response = self.client.get(f"/api/expenses/export/?{query}")
+        if response.status_code != 200:
+            return response, None
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, body = self.export("format=csv")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="expenses.csv"')
+
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], list(exports.COLUMNS))
+        self.assertEqual(
+            [row[:6] for row in rows[1:]],
+            [
+                [str(self.expenses[0].pk), "2025-01-05", "food", "12.50", 'Lunch, "big"', "False"],
+                [str(self.expenses[1].pk), "2025-02-01", "rent", "900.00", "Café", "False"],
+                [str(self.expenses[2].pk), "2025-03-09", "travel", "3.20", "", "False"],
+            ]
+        )
+
+    def test_csv_is_the_default(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(len(body.splitlines()), 4)
+
+    @patch.object(exports, "ROWS_PER_WRITE", 2)
+    def test_ndjson(self):
+        response, body = self.export("format=ndjson")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            [(row["id"], row["date"], row["amount"], row["note"]) for row in lines],
+            [
+                (self.expenses[0].pk, "2025-01-05", "12.50", 'Lunch, "big"'),
+                (self.expenses[1].pk, "2025-02-01", "900.00", "Café"),
+                (self.expenses[2].pk, "2025-03-09", "3.20", ""),
+            ]
+        )
+        self.assertEqual(set(lines[0]), set(exports.COLUMNS))
+
+    def test_date_range(self):
+        _, body = self.export("format=ndjson&from=2025-01-06&to=2025-03-09")
+        self.assertEqual(
+            [json.loads(line)["id"] for line in body.splitlines()],
+            [self.expenses[1].pk, self.expenses[2].pk]
+        )
+
+        response, _ = self.export("from=2025-1-6")
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_format_is_rejected(self):
+        response, _ = self.export("format=xml")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+
+    def test_only_own_expenses(self):
+        _, body = self.export("format=ndjson")
+        self.assertEqual(
+            sorted(json.loads(line)["id"] for line in body.splitlines()),
+            sorted(expense.pk for expense in self.expenses)
+        )
+
+
+class MonthBudgetTests(TestCase):
+
+    FEBRUARY = date(2025, 2, 1)
+    MARCH = date(2025, 3, 1)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="planner", password="secret123")
+        self.other = User.objects.create_user(username="planner-other", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        for user in (self.user, self.other):
+            Budget.objects.bulk_create([
+                Budget(user=user, month=self.FEBRUARY, category="food", amount=300),
+                Budget(user=user, month=self.FEBRUARY, category="rent", amount=1200),
+                Budget(user=user, month=self.FEBRUARY, category="travel", amount=150),
+            ])
+
+    def amounts(self, user, month):
+        return {
+            budget.category: budget.amount
+            for budget in Budget.objects.filter(user=user, month=month)
+        }
+
+    def test_bulk_upsert_updates_listed_categories_only(self):
+        response = self.client.put("/api/budgets/bulk/", {
+            "year": 2025, "month": 2,
+            "budgets": [
+                {"category": "food", "amount": "350"},
+                {"category": "shopping", "amount": "80"},
+            ],
+        }, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.amounts(self.user, self.FEBRUARY), {
+            "food": 350, "rent": 1200, "travel": 150, "shopping": 80,
+        })
+        self.assertEqual(len(response.data), 4)
+        # The update hit the existing row instead of adding one
+        self.assertEqual(Budget.objects.filter(user=self.user, category="food").count(), 1)
+        self.assertEqual(self.amounts(self.other, self.FEBRUARY)["food"], 300)
+
+    def test_bulk_rejects_duplicate_categories(self):
+        response = self.client.put("/api/budgets/bulk/", {
+            "year": 2025, "month": 2,
+            "budgets": [{"category": "food", "amount": "1"}, {"category": "food", "amount": "2"}],
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_rejects_invalid_months(self):
+        for year, month in (("abc", 2), (2025, 13), (2025, None)):
+            response = self.client.put("/api/budgets/bulk/", {
+                "year": year, "month": month,
+                "budgets": [{"category": "food", "amount": "1"}],
+            }, format="json")
+            self.assertEqual(response.status_code, 400, (year, month))
+        self.assertEqual(self.amounts(self.user, self.FEBRUARY)["food"], 300)
+
+    def test_copy_keeps_budgets_already_set(self):
+        Budget.objects.create(user=self.user, month=self.MARCH, category="food", amount=999)
+
+        response = self.client.post("/api/budgets/copy/", {"year": 2025, "month": 3}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["copied"], 2)
+        self.assertEqual(self.amounts(self.user, self.MARCH), {"food": 999, "rent": 1200, "travel": 150})
+        self.assertEqual(self.amounts(self.other, self.MARCH), {})
+
+    def test_copy_rejects_invalid_months(self):
+        for body in ({"year": "x"}, {"year": 2025, "month": 2, "from_year": 2025, "from_month": 2}):
+            response = self.client.post("/api/budgets/copy/", body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_copy_month_sql(self):
+        Budget.objects.create(user=self.other, month=self.MARCH, category="rent", amount=1)
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+            # INSERT ... SELECT, then the users whose versions are bumped
+            copied = Budget.objects.copy_month(self.FEBRUARY, self.MARCH, user_ids=[self.other.pk])
+
+        self.assertEqual(copied, 2)
+        self.assertEqual(self.amounts(self.other, self.MARCH), {"food": 300, "rent": 1, "travel": 150})
+        self.assertEqual(self.amounts(self.user, self.MARCH), {})
+
+        self.assertEqual(Budget.objects.copy_month(self.FEBRUARY, self.MARCH, user_ids=[]), 0)
+        # Everyone; the other user's budgets are all set already
+        self.assertEqual(Budget.objects.copy_month(self.FEBRUARY, self.MARCH), 3)
+        self.assertEqual(Budget.objects.copy_month(self.FEBRUARY, self.MARCH), 0)
+
+    def test_rollforward_budgets_command(self):
+        Budget.objects.create(user=self.user, month=self.MARCH, category="travel", amount=20)
+
+        out = io.StringIO()
+        call_command("rollforward_budgets", month="2025-03", stdout=out)
+
+        self.assertIn("Copied 5 budgets from 2025-02 to 2025-03", out.getvalue())
+        self.assertEqual(self.amounts(self.user, self.MARCH), {"food": 300, "rent": 1200, "travel": 20})
+        self.assertEqual(self.amounts(self.other, self.MARCH), {"food": 300, "rent": 1200, "travel": 150})
+
+        # Safe to run again
+        call_command("rollforward_budgets", month="2025-03", stdout=io.StringIO())
+        self.assertEqual(Budget.objects.filter(month=self.MARCH).count(), 6)
+
+    def test_rollforward_budgets_rejects_a_bad_month(self):
+        with self.assertRaises(CommandError):
+            call_command("rollforward_budgets", month="March", stdout=io.StringIO())
+
+
+class ValuesSerializerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="fast", password="secret123")
+        rule = RecurringRule.objects.create(
+            user=self.user, amount=900, category="rent", day_of_month=31, next_due=date(2025, 3, 1)
+        )
+        Expense.objects.create(user=self.user, amount=12.5, category="food", date=date(2025, 3, 1))
+        Expense.objects.create(
+            user=self.user, amount="900.00", category="rent", date=date(2025, 3, 31),
+            note="rent \u2028 \u00e9", is_recurring=True, recurrence_day=31, rule=rule,
+        )
+        Budget.objects.create(user=self.user, month=date(2025, 3, 1), category="food", amount=300)
+
+    def test_matches_the_model_serializer(self):
+        expenses = Expense.objects.filter(user=self.user)
+        budgets = Budget.objects.filter(user=self.user)
+
+        self.assertEqual(expense_values.data(expenses), ExpenseSerializer(expenses, many=True).data)
+        self.assertEqual(budget_values.data(budgets), BudgetSerializer(budgets, many=True).data)
+
+    def test_fast_renderer_output_is_identical(self):
+        data = expense_values.data(Expense.objects.filter(user=self.user))
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+def format_queries(captured):
+    return "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(captured, 1))
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every endpoint must issue as many queries for a user with a handful of
+    rows as for one with many, and no more than its budget. Requests run on
+    a cold cache and their writes are rolled back.
+    """
+
+    # Endpoint -> most queries one request may issue. The views' atomic
+    # blocks become savepoints inside the test transaction, so writes count
+    # their SAVEPOINT / RELEASE statements too.
+    BUDGETS = {
+        "income": 1,
+        "income.set": 6,
+        "expenses.month": 1,
+        "expenses.page": 1,
+        "expenses.create": 4,
+        "expenses.batch": 15,
+        "expenses.import": 6,
+        "expenses.export": 1,
+        "expenses.update": 7,
+        "expenses.delete": 7,
+        "expenses.generate_recurring": 11,
+        "dashboard": 4,
+        "month": 5,
+        "budgets": 1,
+        "budgets.create": 6,
+        "budgets.bulk": 2,
+        "budgets.copy": 3,
+        "budgets.update": 3,
+        "budgets.delete": 2,
+        "insights": 3,
+        "savings": 1,
+        "savings.history": 2,
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.month = date.today().replace(day=1)
+        self.small = self.seed("few", budgets=1, expenses=3, rules=1, spread=1)
+        self.large = self.seed("many", budgets=5, expenses=40, rules=6, spread=3)
+
+    def seed(self, username, budgets, expenses, rules, spread):
+        """
+        A user with `expenses` spread over the last `spread` months.
+        """
+        user = User.objects.create_user(username=username, password="secret123")
+        months = [add_months(self.month, -2), add_months(self.month, -1), self.month]
+        categories = [choice for choice, _ in Budget.CATEGORY_CHOICES][:budgets]
+
+        MonthlyIncome.objects.bulk_create(
+            MonthlyIncome(user=user, month=month, amount=5000) for month in months
+        )
+        Budget.objects.bulk_create(
+            Budget(user=user, month=month, category=category, amount=500)
+            for month in months[1:]
+            for category in categories
+        )
+        # Three months behind, so generate-recurring has to catch up
+        RecurringRule.objects.bulk_create(
+            RecurringRule(user=user, amount=50, category="rent", day_of_month=1, next_due=months[0])
+            for _ in range(rules)
+        )
+        Expense.objects.bulk_create(
+            Expense(
+                user=user,
+                amount=10 + i,
+                category=Expense.CATEGORY_CHOICES[i % len(Expense.CATEGORY_CHOICES)][0],
+                date=months[-1 - i % spread].replace(day=1 + i % 28),
+            )
+            for i in range(expenses)
+        )
+
+        ids = list(Expense.objects.filter(user=user).values_list("id", flat=True))
+        return {
+            "user": user,
+            "months": months,
+            "categories": categories,
+            "expense_ids": ids,
+            "budget_id": Budget.objects.filter(user=user, month=self.month).first().pk,
+        }
+
+    def endpoint(self, name, seeded):
+        """
+        (method, path, data, format) of the request for `name`.
+        """
+        first, previous, month = seeded["months"]
+        expense_id = seeded["expense_ids"][0]
+        expense = {"amount": "12.50", "category": "food", "date": month.isoformat()}
+        target = add_months(month, 1)
+        csv_rows = "".join(f"{i + 1}.00,food,{month},\n" for i in range(len(seeded["expense_ids"])))
+
+        return {
+            "income": ("get", "/api/income/", None, None),
+            "income.set": ("post", "/api/income/", {"amount": "6000"}, "json"),
+            "expenses.month": ("get", "/api/expenses/", None, None),
+            "expenses.page": ("get", f"/api/expenses/?from={first}&limit=500", None, None),
+            "expenses.create": ("post", "/api/expenses/", expense, "json"),
+            "expenses.batch": ("post", "/api/expenses/batch/", {"operations": [
+                {"op": "update", "id": pk, "data": expense} for pk in seeded["expense_ids"]
+            ] + [{"op": "create", "data": expense}] * len(seeded["expense_ids"])}, "json"),
+            "expenses.import": ("post", "/api/expenses/import/", {
+                "file": SimpleUploadedFile("expenses.csv", f"amount,category,date,note\n{csv_rows}".encode()),
+            }, "multipart"),
+            "expenses.export": ("get", "/api/expenses/export/?format=csv", None, None),
+            "expenses.update": ("put", f"/api/expenses/{expense_id}/update/", expense, "json"),
+            "expenses.delete": ("delete", f"/api/expenses/{expense_id}/", None, None),
+            "expenses.generate_recurring": ("post", "/api/expenses/generate-recurring/", {}, "json"),
+            "dashboard": ("get", "/api/dashboard/", None, None),
+            "month": ("get", "/api/month/", None, None),
+            "budgets": ("get", "/api/budgets/", None, None),
+            "budgets.create": ("post", "/api/budgets/", {
+                "year": target.year, "month": target.month, "category": "food", "amount": "300",
+            }, "json"),
+            "budgets.bulk": ("put", "/api/budgets/bulk/", {
+                "year": target.year, "month": target.month,
+                "budgets": [{"category": c, "amount": "300"} for c in seeded["categories"]],
+            }, "json"),
+            "budgets.copy": ("post", "/api/budgets/copy/", {
+                "year": target.year, "month": target.month,
+            }, "json"),
+            "budgets.update": ("put", f"/api/budgets/{seeded['budget_id']}/update/", {"amount": "700"}, "json"),
+            "budgets.delete": ("delete", f"/api/budgets/{seeded['budget_id']}/delete/", None, None),
+            "insights": ("get", "/api/insights/", None, None),
+            "savings": ("get", "/api/savings/", None, None),
+            "savings.history": ("get", f"/api/savings/history/?from={first:%Y-%m}&to={month:%Y-%m}", None, None),
+        }[name]
+
+    def queries(self, name, seeded):
+        method, path, data, fmt = self.endpoint(name, seeded)
+        client = APIClient()
+        client.force_authenticate(seeded["user"])
+        cache.clear()
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                response = getattr(client, method)(path, data, format=fmt)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+
+        self.assertLess(response.status_code, 400, f"{name} failed: {getattr(response, 'data', '')}")
+        return ctx.captured_queries
+
+    def test_every_endpoint_is_budgeted(self):
+        budgeted = {
+            resolve(self.endpoint(name, self.small)[1].split("?")[0]).route
+            for name in self.BUDGETS
+        }
+        # Admin stats and registration do not touch per-user rows, and
+        # .../delete/ is the same view as DELETE expenses/<id>/
+        unscoped = {
+            "api/cache/stats/", "api/metrics/", "api/register/",
+            "api/expenses/<int:expense_id>/delete/",
+        }
+
+        for pattern in urls.urlpatterns:
+            route = f"api/{pattern.pattern}"
+            if route not in unscoped:
+                self.assertIn(route, budgeted, f"No query budget for {route}")
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(endpoint=name):
+                few = self.queries(name, self.small)
+                many = self.queries(name, self.large)
+
+                self.assertEqual(
+                    len(few), len(many),
+                    f"{name}: {len(few)} queries for the small user, {len(many)} for the large one:\n"
+                    f"{format_queries(many)}"
+                )
+                self.assertLessEqual(
+                    len(many), budget,
+                    f"{name}: {len(many)} queries, budget {budget}:\n{format_queries(many)}"
+                )
+
+
+class MigrationTests(TestCase):
+
+    def test_models_match_migrations(self):
+        # A default evaluated at import would show up as a new AlterField
+        call_command("makemigrations", "expenses", check=True, dry_run=True, stdout=io.StringIO())
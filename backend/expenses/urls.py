@@ -3,26 +3,41 @@ from .views import (
     MonthlyIncomeView,
     ExpenseListCreateView,
     ExpenseDeleteView,
+    ExpenseBatchView,
+    ExpenseImportView,
+    ExpenseExportView,
     DashboardView,
+    MonthBundleView,
     BudgetListCreateView,
+    BudgetBulkView,
+    BudgetCopyView,
     GenerateRecurringExpensesView,
     ExpenseUpdateView,
     BudgetUpdateView,
     BudgetDeleteView,
     InsightsView,
     SavingsView,
-    RegisterView
+    SavingsHistoryView,
+    RegisterView,
+    CacheStatsView,
+    MetricsView,
 )
 
 urlpatterns = [
     path('income/', MonthlyIncomeView.as_view()),
 
     path('expenses/', ExpenseListCreateView.as_view()),
+    path('expenses/batch/', ExpenseBatchView.as_view()),
+    path('expenses/import/', ExpenseImportView.as_view()),
+    path('expenses/export/', ExpenseExportView.as_view()),
     path('expenses/<int:expense_id>/', ExpenseDeleteView.as_view()),
 
     path('dashboard/', DashboardView.as_view()),
+    path('month/', MonthBundleView.as_view()),
 
     path('budgets/', BudgetListCreateView.as_view()),
+    path('budgets/bulk/', BudgetBulkView.as_view()),
+    path('budgets/copy/', BudgetCopyView.as_view()),
     path("expenses/generate-recurring/", GenerateRecurringExpensesView.as_view()),
     path("expenses/<int:expense_id>/update/", ExpenseUpdateView.as_view()),
     path("expenses/<int:expense_id>/delete/", ExpenseDeleteView.as_view()),
@@ -30,5 +45,8 @@ urlpatterns = [
     path("budgets/<int:budget_id>/delete/", BudgetDeleteView.as_view()),
     path("insights/", InsightsView.as_view()),
     path("savings/", SavingsView.as_view()),
+    path("savings/history/", SavingsHistoryView.as_view()),
     path("register/", RegisterView.as_view()),
+    path("cache/stats/", CacheStatsView.as_view()),
+    path("metrics/", MetricsView.as_view()),
 ]
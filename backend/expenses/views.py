@@ -1,26 +1,52 @@
 # imports
 from datetime import date
 
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import MonthlyIncome, Expense, Budget 
-from .serializers import MonthlyIncomeSerializer, ExpenseSerializer, BudgetSerializer
+from .models import MonthlyIncome, Expense, Budget, RecurringRule, add_months
+from .serializers import MonthlyIncomeSerializer, ExpenseSerializer, BudgetSerializer, budget_values, expense_values
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
 from .serializers import RegisterSerializer
 
-
-from django.db.models import Sum
-from datetime import date
-from calendar import monthrange
-from datetime import date
-
-from .services import calculate_savings, update_savings_snapshot
+from .caching import (
+    cache_stats,
+    cached_response,
+    current_month_scopes,
+    expense_list_scopes,
+    ledger_scopes,
+    month_and_previous_scopes,
+    this_month_scopes,
+)
+from .services import (
+    MAX_BATCH_OPERATIONS,
+    MAX_HISTORY_MONTHS,
+    apply_expense_batch,
+    calculate_savings,
+    copy_month_budgets,
+    create_recurring_rule,
+    dashboard_summary,
+    generate_recurring_expenses,
+    load_month_data,
+    month_budgets,
+    month_expenses,
+    months_between,
+    savings_history,
+    stop_recurring_rules,
+    sync_recurring_rule,
+    upsert_month_budgets,
+)
+from backend import metrics
+
+from . import exports, imports, insights, pagination
 
 
 # =========================
@@ -30,6 +56,7 @@ from .services import calculate_savings, update_savings_snapshot
 class SavingsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_response(ledger_scopes)
     def get(self, request):
         year = int(request.query_params.get("year", date.today().year))
         month = int(request.query_params.get("month", date.today().month))
@@ -42,6 +69,50 @@ class SavingsView(APIView):
             "savings": savings
         })
 
+class SavingsHistoryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def parse_month(self, value):
+        year, month = value.split("-")
+        return date(int(year), int(month), 1)
+
+    @cached_response(ledger_scopes)
+    def get(self, request):
+        today = date.today()
+
+        try:
+            end = self.parse_month(
+                request.query_params.get("to", f"{today.year}-{today.month}")
+            )
+            start = (
+                self.parse_month(request.query_params["from"])
+                if "from" in request.query_params
+                else add_months(end, -11)
+            )
+        except ValueError:
+            return Response(
+                {"error": "from and to must be in YYYY-MM format"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if start > end:
+            return Response(
+                {"error": "from must not be after to"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if months_between(start, end) > MAX_HISTORY_MONTHS:
+            return Response(
+                {"error": f"At most {MAX_HISTORY_MONTHS} months can be requested at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            "from": f"{start:%Y-%m}",
+            "to": f"{end:%Y-%m}",
+            "months": savings_history(request.user, start, end)
+        })
+
 # =========================
 # INCOME VIEWS
 # =========================
@@ -53,6 +124,7 @@ class MonthlyIncomeView(APIView):
         today = date.today()
         return date(today.year, today.month, 1)
 
+    @cached_response(this_month_scopes)
     def get(self, request):
         month = self.get_current_month()
 
@@ -94,41 +166,197 @@ class MonthlyIncomeView(APIView):
 class ExpenseListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_month_range(self, year, month):
-        start_date = date(year, month, 1)
+    PAGE_PARAMS = pagination.PAGE_PARAMS
 
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
+    @cached_response(expense_list_scopes)
+    def get(self, request):
+        params = request.query_params
 
-        return start_date, end_date
+        # Plain ?year=&month= keeps returning the whole month as a list
+        if not any(param in params for param in self.PAGE_PARAMS):
+            year = int(params.get("year", date.today().year))
+            month = int(params.get("month", date.today().month))
 
-    def get(self, request):
-        year = int(request.query_params.get("year", date.today().year))
-        month = int(request.query_params.get("month", date.today().month))
+            expenses = month_expenses(request.user, date(year, month, 1))
 
-        start_date, end_date = self.get_month_range(year, month)
+            return Response(expense_values.data(expenses), status=status.HTTP_200_OK)
 
-        expenses = Expense.objects.filter(
-            user=request.user,
-            date__gte=start_date,
-            date__lt=end_date
-        )
+        expenses = Expense.objects.filter(user=request.user)
+        by_month = "year" in params or "month" in params
 
-        serializer = ExpenseSerializer(expenses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if by_month and ("from" in params or "to" in params):
+            return Response(
+                {"error": "use either year and month or from and to"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if by_month:
+                # ?year=&month= with limit/cursor pages through that month
+                month_start = date(
+                    int(params.get("year", date.today().year)),
+                    int(params.get("month", date.today().month)),
+                    1
+                )
+                expenses = expenses.filter(
+                    date__gte=month_start, date__lt=add_months(month_start, 1)
+                )
+            if "from" in params:
+                expenses = expenses.filter(date__gte=date.fromisoformat(params["from"]))
+            if "to" in params:
+                expenses = expenses.filter(date__lte=date.fromisoformat(params["to"]))
+        except (OverflowError, ValueError):
+            return Response(
+                {"error": (
+                    "year and month must be a valid month"
+                    if by_month else "from and to must be in YYYY-MM-DD format"
+                )},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = pagination.parse_limit(params.get("limit"))
+            rows, next_cursor = pagination.keyset_page(
+                expense_values.values(expenses),
+                cursor=params.get("cursor"),
+                limit=limit
+            )
+        except ValueError as exc:
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            "results": expense_values.to_representation(rows),
+            "next": next_cursor
+        })
 
     def post(self, request):
         serializer = ExpenseSerializer(data=request.data)
 
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            expense = serializer.save(user=request.user)
+
+            if expense.is_recurring:
+                create_recurring_rule(expense)
+
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ExpenseBatchView(APIView):
+    """
+    Apply many expense creates, updates and deletes in one transaction:
+    {"operations": [{"op": "create", "data": {...}},
+                    {"op": "update", "id": 1, "data": {...}},
+                    {"op": "delete", "id": 2}]}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data.get("operations")
+
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {"error": "operations must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ok, results = apply_expense_batch(request.user, operations)
+
+        return Response(
+            {"results": results},
+            status=status.HTTP_200_OK if ok else status.HTTP_400_BAD_REQUEST
+        )
+
+
+class ExpenseImportView(APIView):
+    """
+    Import expenses from an uploaded CSV or NDJSON file (multipart field
+    "file"). Columns / keys: amount, category, date, note.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "Upload a CSV or NDJSON file in the 'file' field"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_format = request.data.get("format") or imports.guess_format(upload)
+        if file_format not in imports.FORMATS:
+            return Response(
+                {"error": "format must be one of: csv, ndjson"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            report = imports.import_expenses(request.user, upload, file_format)
+        except imports.InvalidUpload as exc:
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class ExportNegotiation(DefaultContentNegotiation):
+    """
+    The export's ?format= picks the file format, not a DRF renderer,
+    so responses that do get rendered (errors) are always JSON.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
+
+
+class ExpenseExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = ExportNegotiation
+
+    def get(self, request):
+        file_format = request.query_params.get("format", "csv")
+        if file_format not in exports.FORMATS:
+            return Response(
+                {"error": "format must be one of: csv, ndjson"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Pin the database now: the rows are read after the middleware
+        # that picked it has returned
+        expenses = Expense.objects.using(router.db_for_read(Expense)).filter(user=request.user)
+
+        try:
+            if "from" in request.query_params:
+                expenses = expenses.filter(date__gte=date.fromisoformat(request.query_params["from"]))
+            if "to" in request.query_params:
+                expenses = expenses.filter(date__lte=date.fromisoformat(request.query_params["to"]))
+        except ValueError:
+            return Response(
+                {"error": "from and to must be in YYYY-MM-DD format"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = StreamingHttpResponse(
+            exports.stream_expenses(expenses, file_format),
+            content_type=exports.FORMATS[file_format]
+        )
+        response["Content-Disposition"] = f'attachment; filename="expenses.{file_format}"'
+        return response
+
+
 class ExpenseUpdateView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -144,6 +372,7 @@ class ExpenseUpdateView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        was_recurring = expense.is_recurring
         serializer = ExpenseSerializer(
             expense,
             data=request.data,
@@ -151,8 +380,9 @@ class ExpenseUpdateView(APIView):
         )
 
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            expense = serializer.save()
+            sync_recurring_rule(expense, was_recurring)
+            return Response(ExpenseSerializer(expense).data)
 
         return Response(
             serializer.errors,
@@ -174,6 +404,7 @@ class ExpenseDeleteView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        stop_recurring_rules([expense])
         expense.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -185,116 +416,43 @@ class ExpenseDeleteView(APIView):
 class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_month_range(self, year, month):
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-        return start_date, end_date
-
-
+    @cached_response(ledger_scopes)
     def get(self, request):
         user = request.user
         year = int(request.query_params.get("year", date.today().year))
         month = int(request.query_params.get("month", date.today().month))
 
-        start_date, end_date = self.get_month_range(year, month)
-
+        data = load_month_data(user, year, month)
+        savings_balance = calculate_savings(user, year, month)
 
-        # -------- Income --------
-        income_obj = MonthlyIncome.objects.filter(
-            user=user,
-            month=start_date
-        ).first()
-
-        income = income_obj.amount if income_obj else 0
-
-        # -------- Expenses --------
-        expenses = Expense.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lt=end_date
-        )
-
-        total_spent = expenses.aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-
-        # -------- Category Breakdown --------
-        category_breakdown_qs = (
-            expenses
-            .values('category')
-            .annotate(total=Sum('amount'))
-        )
+        return Response(dashboard_summary(data, savings_balance))
 
-        category_breakdown = {
-            item['category']: item['total']
-            for item in category_breakdown_qs
-        }
 
-        # -------- Budgets --------
-        budgets = Budget.objects.filter(
-            user=user,
-            month=start_date
-        )
-
-        category_budgets = {}
-        total_budget = 0
-        # -------- Monthly Balance & Savings --------
-        monthly_balance = income - total_spent
-
-        snapshot = update_savings_snapshot(
-            user=user,
-            year=year,
-            month=month
-        )
-
-        savings_balance = snapshot.savings_balance
-
-
-        for budget in budgets:
-            spent = category_breakdown.get(budget.category, 0)
-            total_budget += budget.amount
-
-            percentage = (
-                round((spent / budget.amount) * 100, 2)
-                if budget.amount > 0
-                else 0
-            )
-
-            category_budgets[budget.category] = {
-                "budget": budget.amount,
-                "spent": spent,
-                "percentage": percentage
-            }
-
-        # -------- Budget Summary --------
-        budget_summary = {
-            "total_budget": total_budget,
-            "income": income,
-            "difference": income - total_budget,
-            "is_over_budgeted": total_budget > income
-        }
+class MonthBundleView(APIView):
+    """
+    Everything the dashboard page shows for a month in one round trip:
+    the dashboard summary, expense list, budgets and insights.
+    """
+    permission_classes = [IsAuthenticated]
 
+    @cached_response(ledger_scopes)
+    def get(self, request):
+        user = request.user
+        year = int(request.query_params.get("year", date.today().year))
+        month = int(request.query_params.get("month", date.today().month))
 
+        data = load_month_data(user, year, month)
+        savings_balance = calculate_savings(user, year, month)
+        expenses = month_expenses(user, data.month)
 
         return Response({
-            "income": income,
-            "total_spent": total_spent,
-
-            "monthly_balance": monthly_balance,
-            "savings_balance": savings_balance,
-
-            "category_breakdown": category_breakdown,
-            "category_budgets": category_budgets,
-            "budget_summary": budget_summary
+            "dashboard": dashboard_summary(data, savings_balance),
+            "expenses": expense_values.data(expenses),
+            "budgets": budget_values.from_instances(data.budgets),
+            "insights": insights.evaluate(data)
         })
 
 
-
-
-
 # =========================
 # BUDGET VIEWS
 # =========================
@@ -304,19 +462,14 @@ from datetime import date
 class BudgetListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_response(current_month_scopes)
     def get(self, request):
         year = int(request.query_params.get("year", date.today().year))
         month = int(request.query_params.get("month", date.today().month))
 
-        month_start = date(year, month, 1)
-
-        budgets = Budget.objects.filter(
-            user=request.user,
-            month=month_start
-        )
+        budgets = month_budgets(request.user, date(year, month, 1))
 
-        serializer = BudgetSerializer(budgets, many=True)
-        return Response(serializer.data)
+        return Response(budget_values.data(budgets))
 
     def post(self, request):
         year = int(request.data.get("year", date.today().year))
@@ -342,6 +495,86 @@ class BudgetListCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BudgetBulkView(APIView):
+    """
+    Set a whole month's budgets in one request:
+    {"year": 2025, "month": 3, "budgets": [{"category": "food", "amount": "5000"}, ...]}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request):
+        try:
+            month_start = date(
+                int(request.data.get("year", date.today().year)),
+                int(request.data.get("month", date.today().month)),
+                1
+            )
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid year or month"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = BudgetSerializer(data=request.data.get("budgets"), many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        categories = [b["category"] for b in serializer.validated_data]
+        if len(set(categories)) != len(categories):
+            return Response(
+                {"error": "Each category may appear only once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        budgets = upsert_month_budgets(request.user, month_start, serializer.validated_data)
+
+        return Response(
+            BudgetSerializer(budgets, many=True).data,
+            status=status.HTTP_200_OK
+        )
+
+
+class BudgetCopyView(APIView):
+    """
+    Copy budgets from one month into another, keeping budgets already
+    set in the target month:
+    {"from_year": 2025, "from_month": 2, "year": 2025, "month": 3}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            target = date(
+                int(request.data.get("year", date.today().year)),
+                int(request.data.get("month", date.today().month)),
+                1
+            )
+            previous = add_months(target, -1)
+            source = date(
+                int(request.data.get("from_year", previous.year)),
+                int(request.data.get("from_month", previous.month)),
+                1
+            )
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid year or month"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if source == target:
+            return Response(
+                {"error": "Source and target month must differ"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        copied = copy_month_budgets(request.user, source, target)
+
+        return Response({
+            "copied": copied,
+            "budgets": BudgetSerializer(month_budgets(request.user, target), many=True).data,
+        })
+
+
 class BudgetDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -402,42 +635,19 @@ class GenerateRecurringExpensesView(APIView):
 
     def post(self, request):
         today = date.today()
-        year = today.year
-        month = today.month
-
-        created = 0
 
-        recurring_expenses = Expense.objects.filter(
+        # The nightly generate_recurring sweep normally leaves nothing due,
+        # so this is a single indexed lookup on (user, next_due)
+        has_due = RecurringRule.objects.filter(
             user=request.user,
-            is_recurring=True
-        )
-
-        for expense in recurring_expenses:
-            # Use safe day (never exceed month length)
-            last_day = monthrange(year, month)[1]
-            day = min(expense.recurrence_day or 1, last_day)
+            is_active=True,
+            next_due__lte=today
+        ).exists()
 
-            expense_date = date(year, month, day)
+        if not has_due:
+            return Response({"created": 0}, status=status.HTTP_200_OK)
 
-            already_exists = Expense.objects.filter(
-                user=request.user,
-                category=expense.category,
-                amount=expense.amount,
-                date=expense_date,
-                note=expense.note
-            ).exists()
-
-            if not already_exists:
-                Expense.objects.create(
-                    user=request.user,
-                    amount=expense.amount,
-                    category=expense.category,
-                    date=expense_date,
-                    note=expense.note,
-                    is_recurring=True,
-                    recurrence_day=expense.recurrence_day
-                )
-                created += 1
+        created = generate_recurring_expenses(request.user, today)
 
         return Response(
             {"created": created},
@@ -451,107 +661,43 @@ class GenerateRecurringExpensesView(APIView):
 class InsightsView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_month_range(self, year, month):
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-        return start_date, end_date
-
+    @cached_response(month_and_previous_scopes)
     def get(self, request):
-        user = request.user
         year = int(request.query_params.get("year", date.today().year))
         month = int(request.query_params.get("month", date.today().month))
 
-        start_date, end_date = self.get_month_range(year, month)
-
-        # ---------- Current Month Expenses ----------
-        current_expenses = Expense.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lt=end_date
-        )
-
-        current_total = current_expenses.aggregate(
-            total=Sum("amount")
-        )["total"] or 0
-
-        # ---------- Previous Month ----------
-        prev_month = month - 1 or 12
-        prev_year = year - 1 if month == 1 else year
-        prev_start, prev_end = self.get_month_range(prev_year, prev_month)
-
-        prev_expenses = Expense.objects.filter(
-            user=user,
-            date__gte=prev_start,
-            date__lt=prev_end
-        )
-
-        prev_total = prev_expenses.aggregate(
-            total=Sum("amount")
-        )["total"] or 0
+        data = load_month_data(request.user, year, month)
 
-        insights = []
+        return Response(insights.evaluate(data))
 
-        # 🔹 Insight 1: Month-over-Month
-        if prev_total > 0:
-            diff = current_total - prev_total
-            percent = round((diff / prev_total) * 100, 1)
 
-            insights.append({
-                "type": "month_comparison",
-                "severity": "warning" if diff > 0 else "positive",
-                "message": f"You spent ₹{abs(diff)} ({abs(percent)}%) {'more' if diff > 0 else 'less'} than last month"
-            })
 
-        # ---------- Budgets ----------
-        budgets = Budget.objects.filter(
-            user=user,
-            month=start_date
-        )
-
-        # 🔹 Insight 2 & 3
-        income_obj = MonthlyIncome.objects.filter(
-            user=user,
-            month=start_date
-        ).first()
-
-        income = income_obj.amount if income_obj else 0
-
-        for budget in budgets:
-            spent = current_expenses.filter(
-                category=budget.category
-            ).aggregate(total=Sum("amount"))["total"] or 0
-
-            percent = round((spent / budget.amount) * 100, 1) if budget.amount else 0
+# =========================
+# CACHE VIEWS
+# =========================
 
-            if percent >= 90:
-                insights.append({
-                    "type": "budget_warning",
-                    "severity": "danger",
-                    "message": f"{budget.category.capitalize()} budget is at {percent}% usage"
-                })
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
 
-            if income and (budget.amount / income) >= 0.5:
-                insights.append({
-                    "type": "income_pressure",
-                    "severity": "warning",
-                    "message": f"{budget.category.capitalize()} consumes {round((budget.amount/income)*100)}% of your income"
-                })
+    def get(self, request):
+        return Response(cache_stats())
 
-        # 🔹 Insight 4: Total budget exceeded
-        total_budget = sum(b.amount for b in budgets)
 
-        if income and total_budget > income:
-            insights.append({
-                "type": "over_budget",
-                "severity": "danger",
-                "message": "Your total budget exceeds your income"
-            })
+# =========================
+# METRICS VIEWS
+# =========================
 
-        return Response(insights)
+class MetricsView(APIView):
+    """
+    Per-view request metrics of this worker process, for Prometheus.
+    """
+    permission_classes = [IsAdminUser]
 
+    def get(self, request):
+        return HttpResponse(
+            metrics.registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
 
 
 class RegisterView(APIView):
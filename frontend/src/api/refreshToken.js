@@ -10,6 +10,10 @@ const refreshToken = async () => {
   );
 
   localStorage.setItem("access_token", response.data.access);
+  // Refresh tokens are rotated: the old one stops working once blacklisted
+  if (response.data.refresh) {
+    localStorage.setItem("refresh_token", response.data.refresh);
+  }
   return response.data.access;
 };
 
@@ -41,17 +41,12 @@ const Dashboard = () => {
         await api.post("expenses/generate-recurring/");
       }
 
-      const [dash, exp, bud, ins] = await Promise.all([
-        api.get(`dashboard/?year=${year}&month=${month}`),
-        api.get(`expenses/?year=${year}&month=${month}`),
-        api.get(`budgets/?year=${year}&month=${month}`),
-        api.get(`insights/?year=${year}&month=${month}`)
-      ]);
-
-      setDashboard(dash.data);
-      setExpenses(exp.data);
-      setBudgets(bud.data);
-      setInsights(ins.data);
+      const res = await api.get(`month/?year=${year}&month=${month}`);
+
+      setDashboard(res.data.dashboard);
+      setExpenses(res.data.expenses);
+      setBudgets(res.data.budgets);
+      setInsights(res.data.insights);
     } catch (error) {
       console.error("Dashboard fetch failed", error);
     } finally {